@@ -4,80 +4,126 @@ import traceback
 import sys
 
 
-try:
-    GAME = h.Game("Maccabee")
+NAME = "Maccabee"
 
-    #
-    #
-    ##############
-    # Game Start #
-    ##############
-    #
-    #
 
-    while True:
-        MAP = GAME.update_map()
-        ME = MAP.get_me()
+def play(game=None):
+    """
+    Play one game until the engine stops sending frames. Pass a Game to
+    play over something other than stdin/stdout (see arena.worker).
+    """
+    try:
+        GAME = game or h.Game(NAME, speculate=True)
 
         #
-        # Execute assigned tasks
         #
-        for ship in ME.all_ships():
-            try:
-                ship.resolve_task()
-            except Exception:
-                exc_type, exc_value, exc_traceback = sys.exc_info()
-                lines = traceback.format_exception(exc_type, exc_value, exc_traceback)
-                for line in lines:
-                    logging.exception(line)
-
-        for planet in MAP.all_planets():
-            if planet.forces:
-                if planet.is_empty():
-                    logging.info("{} is empty".format(planet))
-                    for ship in planet.forces:
-                        ship.target = planet
-                        ship.task = h.IS.MINING
-                        ship.resolve_task()
-                elif planet.is_mine():
-                    if planet.is_mineable():
-                        logging.info("{} is mineable".format(planet))
+        ##############
+        # Game Start #
+        ##############
+        #
+        #
+
+        while True:
+            MAP = GAME.update_map()
+            ME = MAP.get_me()
+
+            #
+            # Opening: meet rushes head on
+            #
+            rushers = h.opening.rushing_ships(MAP, GAME.turns)
+            if rushers:
+                logging.info("Rushed by {}".format(rushers))
+            undocked = MAP.ships_with(ME.id, h.Ship.DockingStatus.UNDOCKED)
+            # a few ships go for each rusher; the rest keep expanding
+            chase = h.opening.rush_defenders(MAP, rushers, undocked)
+            for ship in undocked:
+                if ship in chase:
+                    ship.task = h.IS.ATTACKING
+                    ship.target = chase[ship]
+                elif ship.task == h.IS.ATTACKING:
+                    # the rush is over (or others have it covered)
+                    ship.task = h.IS.FREE
+                    ship.target = None
+
+            #
+            # Execute assigned tasks
+            #
+            # docked ships with nothing new to decide are skipped
+            h.resolve_all(ME.active_ships())
+
+            guarded = []  # our threatened planets, see below
+            for planet in MAP.all_planets():
+                if planet.forces:
+                    if planet.is_empty():
+                        logging.info("{} is empty".format(planet))
                         for ship in planet.forces:
                             ship.target = planet
                             ship.task = h.IS.MINING
                             ship.resolve_task()
-                    else:
-                        logging.info("{} is mine".format(planet))
-                        if len(planet.forces) > 4:
+                    elif planet.is_mine():
+                        if planet.is_mineable():
+                            logging.info("{} is mineable".format(planet))
                             for ship in planet.forces:
-                                ship.task = h.IS.INVADING
-                                ship.target = None
+                                ship.target = planet
+                                ship.task = h.IS.MINING
                                 ship.resolve_task()
-                            planet.forces = set()
                         else:
-                            for ship in planet.forces:
-                                ship.navigate(ship.closest_point_to(planet))
-
-                elif planet.is_someone_elses():
-                    logging.info("{} is someone elses".format(planet))
-                    ds = planet.all_docked_ships()
-                    for ship in planet.forces:
-                        ds.sort(key=lambda s: s - ship)
-                        ship.navigate(ship.closest_point_to(ds[0]))
-
-                logging.info("{}".format(planet.forces))
-
-        for ship in ME.all_ships():
-            if ship.command:
-                # logging.info(ship.command)
-                GAME.command(ship.command)
-            else:
-                pass
-                # logging.info("No command: {}".format(ship))
-
-        GAME.end_turn()
-except Exception as e:
-    exc_type, exc_value, exc_traceback = sys.exc_info()
-    lines = traceback.format_exception(exc_type, exc_value, exc_traceback)
-    for line in lines:
-        logging.exception(line)
+                            logging.info("{} is mine".format(planet))
+                            if len(planet.forces) > h.params.PARAMS["invade_threshold"]:
+                                for ship in planet.forces:
+                                    ship.task = h.IS.INVADING
+                                    ship.target = None
+                                    ship.resolve_task()
+                                planet.forces = set()
+                            elif MAP.is_threatened(planet):
+                                guarded.append(planet)
+                            else:
+                                for squad in h.form_squads(planet.forces):
+                                    squad.navigate(squad.leader.closest_point_to(planet))
+
+                    elif planet.is_someone_elses():
+                        logging.info("{} is someone elses".format(planet))
+                        ds = planet.all_docked_ships()
+                        for squad in h.form_squads(planet.forces):
+                            target = h.intercept.earliest([squad.leader], ds, MAP)[0]
+                            squad.navigate(squad.leader.closest_point_to(target))
+
+                    logging.info("{}".format(planet.forces))
+
+            # defenders of threatened planets spread out between the
+            # threats and our docked ships
+            spots = h.defense.guard_positions(MAP, guarded)
+            for planet in guarded:
+                for ship in planet.forces:
+                    if ship in spots:
+                        ship.navigate(spots[ship])
+                    else:
+                        ship.navigate(ship.closest_point_to(planet))
+
+            #
+            # Local fights: search for better joint moves while time is left
+            #
+            MAP.flush_navigation()
+            h.search.plan_fights(MAP, GAME.deadline(h.search.RESERVE))
+            MAP.flush_navigation()
+
+            for ship in ME.active_ships():
+                if ship.command:
+                    # logging.info(ship.command)
+                    GAME.command(ship.command)
+                else:
+                    pass
+                    # logging.info("No command: {}".format(ship))
+
+            GAME.end_turn()
+    except EOFError:
+        logging.info("Game over")
+    except Exception as e:
+        exc_type, exc_value, exc_traceback = sys.exc_info()
+        lines = traceback.format_exception(exc_type, exc_value, exc_traceback)
+        for line in lines:
+            logging.exception(line)
+
+
+if __name__ == "__main__":
+    play()
@@ -0,0 +1,4 @@
+"""
+Local tooling for running and evaluating bots against each other with the
+Halite II engine binary. Not imported by the bots themselves.
+"""
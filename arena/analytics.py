@@ -0,0 +1,224 @@
+"""
+Per-game, per-player metrics from Halite II replay files:
+
+* production: production rate per frame (docked ships x BASE_PRODUCTIVITY)
+* ships_spawned: ships produced over the game
+* lost_to_combat / lost_to_collision: ships destroyed, by likely cause
+* idle_ship_turns: undocked ship-turns without any command
+* first_dock: first frame with a ship docking, or None
+* planet_share: share of planets owned, per frame
+
+    python3 -m arena.analytics replays/*.hlt
+"""
+import argparse
+import collections
+import json
+import math
+import multiprocessing
+
+from h import constants
+
+try:
+    import zstandard
+except ImportError:  # replays written uncompressed can still be read
+    zstandard = None
+
+
+#: Docking states, as the replay spells them
+UNDOCKED = "undocked"
+
+
+PlayerStats = collections.namedtuple(
+    "PlayerStats", "game player name rank production ships_spawned lost_to_combat "
+                   "lost_to_collision idle_ship_turns first_dock planet_share")
+
+
+def load(path):
+    """
+    Reads a replay, compressed (needs the zstandard package) or not.
+
+    :rtype: dict
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    try:
+        return json.loads(data.decode("utf-8"))
+    except (UnicodeDecodeError, ValueError):
+        if zstandard is None:
+            raise ValueError("{} looks compressed; install zstandard to read it".format(path))
+        return json.loads(zstandard.ZstdDecompressor().decompress(data).decode("utf-8"))
+
+
+def _status(ship):
+    docking = ship.get("docking", {})
+    return docking.get("status", UNDOCKED) if isinstance(docking, dict) else UNDOCKED
+
+
+def _ships(frame):
+    """
+    {ship id: (owner, ship dict)} for a frame.
+    """
+    ships = {}
+    for owner, by_id in frame.get("ships", {}).items():
+        for sid, ship in by_id.items():
+            ships[int(sid)] = (int(owner), ship)
+    return ships
+
+
+def _commanded(moves):
+    """
+    Ids of ships given a command in one frame's moves.
+    """
+    ids = set()
+    for per_player in (moves or {}).values():
+        for batch in per_player if isinstance(per_player, list) else [per_player]:
+            ids.update(int(sid) for sid in batch)
+    return ids
+
+
+def _cause(ship, owner, previous):
+    """
+    Guess why a ship died from the frame before: combat if enough enemy
+    fire could have reached it to finish it off, else a collision.
+    """
+    reach = constants.WEAPON_RADIUS + 2 * constants.MAX_SPEED
+    shooters = sum(1 for other_owner, other in previous.values()
+                   if other_owner != owner and _status(other) == UNDOCKED
+                   and math.hypot(other["x"] - ship["x"], other["y"] - ship["y"]) <= reach)
+    if shooters and ship.get("health", constants.MAX_SHIP_HEALTH) <= shooters * constants.WEAPON_DAMAGE:
+        return "combat"
+    return "collision"
+
+
+def _ranks(replay, players, last_alive):
+    """
+    Final rank of each player: the engine's own, from the replay's stats
+    when it has them. Otherwise the engine's order is rebuilt: players who
+    lasted longer rank higher, and players alive at the end are ordered by
+    ships left, then by their total health. Players tied on all of these
+    share a rank.
+    """
+    stats = replay.get("stats") or {}
+    if all(str(p) in stats and "rank" in stats[str(p)] for p in players):
+        return {p: int(stats[str(p)]["rank"]) for p in players}
+    last = _ships(replay["frames"][-1]) if replay["frames"] else {}
+    ships = collections.Counter(owner for owner, _ in last.values())
+    health = collections.Counter()
+    for owner, ship in last.values():
+        health[owner] += ship.get("health", 0)
+    key = {p: (last_alive.get(p, -1), ships[p], health[p]) for p in players}
+    return {p: 1 + sum(1 for q in players if key[q] > key[p]) for p in players}
+
+
+def analyze(replay, game=None):
+    """
+    Metrics for each player of one replay (a dict from load(), or a path).
+
+    :rtype: list[PlayerStats]
+    """
+    if not isinstance(replay, dict):
+        game = game or replay
+        replay = load(replay)
+    players = range(replay["num_players"])
+    names = replay.get("player_names", [str(p) for p in players])
+    frames = replay["frames"]
+    moves = replay.get("moves", [])
+    total_planets = max(1, len(replay.get("planets", ())) or len(frames[0].get("planets", {})))
+
+    production = {p: [] for p in players}
+    share = {p: [] for p in players}
+    spawned = collections.Counter()
+    combat = collections.Counter()
+    collision = collections.Counter()
+    idle = collections.Counter()
+    first_dock = {}
+    last_alive = {}
+
+    previous = {}
+    for i, frame in enumerate(frames):
+        ships = _ships(frame)
+        commanded = _commanded(moves[i] if i < len(moves) else None)
+        docked = collections.Counter()
+        for sid, (owner, ship) in ships.items():
+            status = _status(ship)
+            if status == "docked":
+                docked[owner] += 1
+            if status != UNDOCKED and owner not in first_dock:
+                first_dock[owner] = i
+            if status == UNDOCKED and sid not in commanded and i < len(moves):
+                idle[owner] += 1
+            last_alive[owner] = i
+
+        owned = collections.Counter(int(p["owner"]) for p in frame.get("planets", {}).values()
+                                    if p.get("owner") is not None)
+        for p in players:
+            production[p].append(docked[p] * constants.BASE_PRODUCTIVITY)
+            share[p].append(owned[p] / total_planets)
+
+        for event in frame.get("events", ()):
+            entity = event.get("entity", {})
+            if entity.get("type") != "ship":
+                continue
+            owner = int(entity.get("owner", -1))
+            if event.get("event") == "spawned":
+                spawned[owner] += 1
+            elif event.get("event") == "destroyed":
+                sid = int(entity["id"])
+                if sid in previous:
+                    cause = _cause(previous[sid][1], owner, previous)
+                    (combat if cause == "combat" else collision)[owner] += 1
+        previous = ships
+
+    rank = _ranks(replay, players, last_alive)
+    return [PlayerStats(game, p, names[p], rank[p], production[p], spawned[p], combat[p],
+                        collision[p], idle[p], first_dock.get(p), share[p])
+            for p in players]
+
+
+def analyze_many(paths, workers=None):
+    """
+    analyze() every replay, spread over a process pool.
+
+    :rtype: list[PlayerStats]
+    """
+    with multiprocessing.Pool(workers) as pool:
+        per_game = pool.map(analyze, paths)
+    return [stats for game in per_game for stats in game]
+
+
+def summarize(stats):
+    """
+    Averages of the scalar metrics per bot name, over all games played.
+
+    :rtype: dict
+    """
+    by_name = collections.defaultdict(list)
+    for s in stats:
+        by_name[s.name].append(s)
+    summary = {}
+    for name, games in sorted(by_name.items()):
+        docks = [g.first_dock for g in games if g.first_dock is not None]
+        summary[name] = {
+            "games": len(games),
+            "win_rate": sum(g.rank == 1 for g in games) / len(games),
+            "mean_production": sum(sum(g.production) / max(1, len(g.production)) for g in games) / len(games),
+            "ships_spawned": sum(g.ships_spawned for g in games) / len(games),
+            "lost_to_combat": sum(g.lost_to_combat for g in games) / len(games),
+            "lost_to_collision": sum(g.lost_to_collision for g in games) / len(games),
+            "idle_ship_turns": sum(g.idle_ship_turns for g in games) / len(games),
+            "first_dock": sum(docks) / len(docks) if docks else None,
+            "final_planet_share": sum(g.planet_share[-1] for g in games if g.planet_share) / len(games),
+        }
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize Halite II replays per bot.")
+    parser.add_argument("replays", nargs="+")
+    parser.add_argument("-j", "--workers", type=int, default=None)
+    args = parser.parse_args()
+    print(json.dumps(summarize(analyze_many(args.replays, args.workers)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
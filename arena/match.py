@@ -0,0 +1,183 @@
+"""
+Headless match runner: runs the engine binary on chosen seeds, map sizes
+and bot commands, and collects the results as structured records.
+
+    python3 -m arena.match -n 20 -j 4 -o results.jsonl \\
+        "python3 MyBot.py" "python3 Opponent.py"
+"""
+import argparse
+import collections
+import concurrent.futures
+import json
+import logging
+import os
+import signal
+import subprocess
+import time
+
+
+#: Repository root; bot commands are run from here
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+#: The engine binary
+HALITE = os.path.join(ROOT, "halite")
+
+#: Default wall-clock seconds one match may take before it is killed
+BUDGET = 600
+
+
+MatchResult = collections.namedtuple(
+    "MatchResult", "seed width height bots ranks replay elapsed error")
+MatchResult.__doc__ = """
+The outcome of one match.
+
+:ivar list[int] ranks: Final rank of each bot, in the order of bots (1 is
+    the winner), or None if the match did not finish
+:ivar str replay: Path of the replay file, if one was written
+:ivar float elapsed: Wall-clock seconds the match took
+:ivar str error: Why the match did not finish, or None
+"""
+
+
+def _key(seed, width, height, bots):
+    return json.dumps([seed, width, height, list(bots)])
+
+
+def command(bots, seed=None, width=240, height=160, replay_dir=None):
+    """
+    The engine command line for a match, in quiet (machine readable) mode.
+
+    :param list[str] bots: Shell commands starting each bot
+    :param int seed: Map seed, or None for a random map
+    :param str replay_dir: Where to write the replay, or None for no replay
+    :rtype: list[str]
+    """
+    argv = [HALITE, "-q", "-d", "{} {}".format(width, height)]
+    if seed is not None:
+        argv += ["-s", str(seed)]
+    if replay_dir is None:
+        argv += ["--noreplay"]
+    else:
+        argv += ["-i", replay_dir]
+    return argv + list(bots)
+
+
+def run_match(bots, seed=None, width=240, height=160, replay_dir=None, budget=BUDGET):
+    """
+    Run one match and return its MatchResult. The engine and every bot it
+    started are killed if the match takes longer than budget seconds.
+    """
+    started = time.time()
+    process = subprocess.Popen(command(bots, seed, width, height, replay_dir),
+                               cwd=ROOT, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                               universal_newlines=True, start_new_session=True)
+    try:
+        out, err = process.communicate(timeout=budget)
+    except subprocess.TimeoutExpired:
+        os.killpg(process.pid, signal.SIGKILL)
+        process.communicate()
+        return MatchResult(seed, width, height, list(bots), None, None,
+                           time.time() - started, "timed out after {}s".format(budget))
+    elapsed = time.time() - started
+
+    if process.returncode != 0:
+        return MatchResult(seed, width, height, list(bots), None, None, elapsed,
+                           "engine exited with {}: {}".format(process.returncode, err.strip()[-500:]))
+    try:
+        data = json.loads(out)
+        stats = data["stats"]
+        ranks = [stats[str(i)]["rank"] for i in range(len(bots))]
+    except (ValueError, KeyError) as e:
+        return MatchResult(seed, width, height, list(bots), None, None, elapsed,
+                           "unreadable engine output ({}): {}".format(e, out.strip()[-500:]))
+    return MatchResult(data.get("map_seed", seed), width, height, list(bots), ranks,
+                       data.get("replay"), elapsed, None)
+
+
+def load_results(path):
+    """
+    Reads the results written by run_matches so far.
+
+    :rtype: list[MatchResult]
+    """
+    results = []
+    if not os.path.exists(path):
+        return results
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                try:
+                    results.append(MatchResult(**json.loads(line)))
+                except (ValueError, TypeError):
+                    logging.warning("Skipping unreadable result line: {}".format(line))
+    return results
+
+
+def run_matches(specs, workers=None, results_path=None, **kwargs):
+    """
+    Run many matches, at most workers at a time (default: one per core).
+    Each result is appended to results_path as soon as it is in, and specs
+    that already finished there are skipped, so an interrupted run picks up
+    where it stopped (failed matches are run again).
+
+    :param specs: Iterable of (bots, seed, width, height) tuples
+    :param kwargs: Passed on to run_match (replay_dir, budget)
+    :return: Results of all specs, including ones found in results_path
+    :rtype: list[MatchResult]
+    """
+    done = {}
+    if results_path:
+        for r in load_results(results_path):
+            if r.ranks is not None:
+                done[_key(r.seed, r.width, r.height, r.bots)] = r
+
+    specs = list(specs)
+    todo = [s for s in specs if _key(s[1], s[2], s[3], s[0]) not in done]
+    logging.info("Running {} matches ({} already done)".format(len(todo), len(specs) - len(todo)))
+
+    out = open(results_path, "a") if results_path else None
+    try:
+        with concurrent.futures.ThreadPoolExecutor(workers or os.cpu_count() or 1) as pool:
+            futures = {pool.submit(run_match, bots, seed, width, height, **kwargs):
+                       (bots, seed, width, height) for bots, seed, width, height in todo}
+            for future in concurrent.futures.as_completed(futures):
+                bots, seed, width, height = futures[future]
+                # record under the seed asked for, so resuming finds it
+                result = future.result()._replace(seed=seed)
+                done[_key(seed, width, height, bots)] = result
+                if out:
+                    out.write(json.dumps(result._asdict()) + "\n")
+                    out.flush()
+    finally:
+        if out:
+            out.close()
+    return [done[_key(s[1], s[2], s[3], s[0])] for s in specs]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run Halite II matches headlessly.")
+    parser.add_argument("bots", nargs="+", help="shell command for each bot")
+    parser.add_argument("-n", "--matches", type=int, default=1)
+    parser.add_argument("-s", "--seed", type=int, default=1, help="seed of the first match")
+    parser.add_argument("-d", "--dimensions", default="240 160")
+    parser.add_argument("-j", "--workers", type=int, default=None)
+    parser.add_argument("-o", "--out", default=None, help="JSON lines file of results (resumable)")
+    parser.add_argument("-i", "--replays", default=None, help="directory for replays")
+    parser.add_argument("-b", "--budget", type=float, default=BUDGET)
+    args = parser.parse_args()
+
+    width, height = (int(x) for x in args.dimensions.split())
+    specs = [(args.bots, args.seed + i, width, height) for i in range(args.matches)]
+    results = run_matches(specs, args.workers, args.out,
+                          replay_dir=args.replays, budget=args.budget)
+    wins = collections.Counter(r.ranks.index(1) for r in results if r.ranks)
+    for i, bot in enumerate(args.bots):
+        print("{:>4} wins  {}".format(wins[i], bot))
+    failed = [r for r in results if r.error]
+    if failed:
+        print("{} matches failed, e.g.: {}".format(len(failed), failed[0].error))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Self-play parameter tuning by successive halving. Candidate parameter sets
+(see h/params.py) play gauntlet matches against the Fighters/ bots, all
+cores busy; each round the weaker half is dropped and the survivors play
+twice as many games, until one is left. The winner is written to the
+parameter file the bot loads at start-up.
+
+    python3 -m arena.tuner -c 16 -g 4 -o params.json
+"""
+import argparse
+import glob
+import json
+import logging
+import os
+import random
+import tempfile
+import zipfile
+
+from h import params
+from . import match
+
+
+#: Directory of zipped sparring bots
+FIGHTERS = os.path.join(match.ROOT, "Fighters")
+
+#: Candidates whose win rate trails the round's best by more than this are
+#: dropped even if halving alone would keep them
+CUTOFF = 0.5
+
+
+def fighters(directory=FIGHTERS):
+    """
+    Unpacks every zipped bot (once) and returns the commands that start them.
+
+    :rtype: list[str]
+    """
+    commands = []
+    cache = os.path.join(tempfile.gettempdir(), "halite-fighters")
+    for path in sorted(glob.glob(os.path.join(directory, "*.zip"))):
+        target = os.path.join(cache, os.path.splitext(os.path.basename(path))[0])
+        if not os.path.exists(os.path.join(target, "MyBot.py")):
+            with zipfile.ZipFile(path) as z:
+                z.extractall(target)
+        commands.append("cd {} && python3 MyBot.py".format(target))
+    return commands
+
+
+def sample(rng):
+    """
+    A random parameter set within params.RANGES.
+    """
+    candidate = {}
+    for name, (low, high, kind) in sorted(params.RANGES.items()):
+        candidate[name] = rng.randint(low, high) if kind is int else round(rng.uniform(low, high), 2)
+    return candidate
+
+
+def evaluate(candidates, games, opponents, seed, workdir, workers=None, results_path=None):
+    """
+    Play games gauntlet matches for each candidate, on the same seeds for
+    every candidate and alternating which side it starts on.
+
+    :param dict candidates: Parameter sets by candidate id
+    :return: Win rate by candidate id
+    :rtype: dict
+    """
+    specs = []
+    sides = []  # (candidate id, index of the candidate among the bots)
+    for cid, candidate in sorted(candidates.items()):
+        path = os.path.join(workdir, "candidate-{}.json".format(cid))
+        params.save(candidate, path)
+        bot = "H_PARAMS={} python3 MyBot.py".format(path)
+        for g in range(games):
+            opponent = opponents[g % len(opponents)]
+            bots = [bot, opponent] if g % 2 == 0 else [opponent, bot]
+            specs.append((bots, seed + g, 240, 160))
+            sides.append((cid, g % 2))
+
+    results = match.run_matches(specs, workers, results_path)
+    wins = {cid: 0 for cid in candidates}
+    for (cid, side), result in zip(sides, results):
+        if result.ranks and result.ranks[side] == 1:
+            wins[cid] += 1
+    return {cid: wins[cid] / games for cid in candidates}
+
+
+def tune(n_candidates=16, games=4, eta=2, seed=1, workers=None, results_path=None):
+    """
+    Successive halving over n_candidates parameter sets (the defaults are
+    always one of them). Returns the best parameter set.
+    """
+    rng = random.Random(seed)
+    candidates = {0: dict(params.DEFAULTS)}
+    for cid in range(1, n_candidates):
+        candidates[cid] = sample(rng)
+    opponents = fighters()
+    # same paths (so same bot commands) on every run, so results_path resumes
+    workdir = os.path.join(tempfile.gettempdir(), "halite-tuner-{}".format(seed))
+    os.makedirs(workdir, exist_ok=True)
+
+    rnd = 0
+    while len(candidates) > 1:
+        # fresh seeds every round, shared by all candidates within it
+        rates = evaluate(candidates, games, opponents, seed + 1000 * rnd, workdir,
+                         workers, results_path)
+        best = max(rates.values())
+        ranked = sorted(candidates, key=lambda c: rates[c], reverse=True)
+        keep = max(1, len(ranked) // eta)
+        survivors = [c for c in ranked[:keep] if rates[c] >= best - CUTOFF]
+        for cid in ranked:
+            logging.info("round {} candidate {} win rate {:.2f} {}{}".format(
+                rnd, cid, rates[cid], json.dumps(candidates[cid], sort_keys=True),
+                "" if cid in survivors else " (dropped)"))
+        candidates = {c: candidates[c] for c in survivors}
+        games *= eta
+        rnd += 1
+    return next(iter(candidates.values()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tune h/params.py by successive halving.")
+    parser.add_argument("-c", "--candidates", type=int, default=16)
+    parser.add_argument("-g", "--games", type=int, default=4, help="games per candidate in round one")
+    parser.add_argument("-e", "--eta", type=int, default=2, help="keep 1/eta of candidates per round")
+    parser.add_argument("-s", "--seed", type=int, default=1)
+    parser.add_argument("-j", "--workers", type=int, default=None)
+    parser.add_argument("-r", "--results", default=None, help="JSON lines match log (resumable)")
+    parser.add_argument("-o", "--out", default=params.PARAMS_FILE)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    best = tune(args.candidates, args.games, args.eta, args.seed, args.workers, args.results)
+    params.save(best, args.out)
+    print("Best parameters written to {}: {}".format(args.out, best))
+
+
+if __name__ == "__main__":
+    main()
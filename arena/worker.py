@@ -0,0 +1,106 @@
+"""
+Persistent bot worker: loads a bot module once and plays any number of
+games in-process, talking to the bot through an in-memory
+h.transport.QueueTransport instead of stdin/stdout. Saves interpreter start-up, imports and module set-up per game.
+
+A worker plays one game at a time: the bot's ships keep their tasks and
+targets in process-wide memory (h.Entity._memory), which each game starts
+by clearing, and ship ids are only unique within a game.
+
+The bot module must define NAME and play(game), like MyBot.py:
+
+    worker = BotWorker("MyBot")
+    session = worker.new_game()
+    session.send("0")            # our player tag
+    session.send("240 160")      # map size
+    session.send(first_frame)
+    name = session.receive()
+    session.send(frame)
+    commands = session.receive()
+    ...
+    session.close()
+"""
+import importlib
+import threading
+
+import h
+from h.transport import QueueTransport
+
+
+#: Seconds to wait for the bot to answer before giving up on it
+TIMEOUT = 10
+
+
+class Session:
+    """
+    One game being played by a worker's bot, in its own thread. The game
+    ends, and the thread with it, when the bot reads the end of input that
+    close() sends.
+    """
+
+    def __init__(self, module, manage_gc=False):
+        self.transport = QueueTransport()
+        self.error = None
+        self._thread = threading.Thread(target=self._run, args=(module, manage_gc), daemon=True)
+        self._thread.start()
+
+    def _run(self, module, manage_gc):
+        try:
+            module.play(h.Game(module.NAME, manage_gc=manage_gc, transport=self.transport))
+        except Exception as e:
+            self.error = e
+        finally:
+            self.transport.hang_up()
+
+    def send(self, line):
+        """
+        Send one line (a frame, or a set-up line) to the bot.
+        """
+        self.transport.send(line)
+
+    def receive(self, timeout=TIMEOUT):
+        """
+        The bot's next line (its name, then one command line per frame)
+        without the trailing newline, or None if the bot has stopped.
+        """
+        return self.transport.receive(timeout)
+
+    def running(self):
+        return self._thread.is_alive()
+
+    def close(self, timeout=TIMEOUT):
+        """
+        End the game: the bot reads end of input and its thread exits.
+        """
+        self.transport.close()
+        self._thread.join(timeout)
+
+
+class BotWorker:
+    """
+    Holds a bot module loaded once, and starts games against it.
+    """
+
+    def __init__(self, module_name):
+        self.module = importlib.import_module(module_name)
+        self._session = None
+
+    def reset(self):
+        """
+        Clear state that outlives a game: the per-entity memory behind
+        Persist attributes (tasks and targets).
+        """
+        h.Entity._memory.clear()
+
+    def new_game(self):
+        """
+        Reset and start a game; the bot waits for its set-up lines. Raises
+        RuntimeError while the worker's previous game is still running.
+
+        :rtype: Session
+        """
+        if self._session is not None and self._session.running():
+            raise RuntimeError("{} is still playing a game; close() it first".format(self.module.NAME))
+        self.reset()
+        self._session = Session(self.module)
+        return self._session
@@ -12,4 +12,12 @@ from .planet import Planet
 from .ship import Ship
 from . import game_map
 from .networking import Game
-from .assignments import IS
+from . import transport
+from .snapshot import Snapshot
+from .assignments import IS, resolve_all
+from .squads import Squad, form_squads
+from . import opening
+from . import search
+from . import intercept
+from . import defense
+from . import params
@@ -1,11 +1,51 @@
 # assignments.py
 
 
-from enum import Enum
+from enum import IntEnum
 from .planet import Planet
+from . import intercept
+from .params import PARAMS
 import logging
 
 
+class IS(IntEnum):
+    """
+    Ship tasks. Each is an index into HANDLERS.
+    """
+    FREE = 0
+
+    DEFENDING = 1  # planet
+
+    MINING = 2
+
+    INVADING = 3  # targeting planets
+
+    CRASHING = 4  # colliding with planets
+    KAMIKAZE = 5  # colliding with ships
+    ATTACKING = 6  # fighting ships
+
+
+#: Most task changes one ship may go through in a turn before it is left
+#: where it is
+MAX_TRANSITIONS = len(IS)
+
+#: Distance a planet may be further off per production unit it is forecast
+#: to make over the forecast's horizon, when picking planets to invade
+PRODUCTION_WEIGHT = PARAMS["production_weight"]
+
+
+def most_valuable_planet(ship, planets):
+    """
+    The planet among planets worth most to ship: the nearest, counting each
+    production unit it is forecast to make (see forecast.py) as
+    PRODUCTION_WEIGHT less distance. Raises IndexError if there is none.
+    """
+    if not planets:
+        raise IndexError("no planet matches")
+    production = ship.map.production
+    return min(planets, key=lambda p: p - ship - PRODUCTION_WEIGHT * production.production(p))
+
+
 #
 # Handlers should mutate the ship. No need to return values.
 #
@@ -16,7 +56,8 @@ def handle_free(ship):
     # Make it mine, then consider defending.
     #
     try:
-        p = ship.closest_planet(where=lambda p: p.is_mineable())
+        p = ship.map.forecast.target(ship) if ship.map.forecast else None
+        p = p or ship.closest_planet(among=ship.map.mineable_planets())
         ship.navigate(p)
         ship.task = IS.MINING
         ship.target = p
@@ -29,7 +70,8 @@ def handle_free(ship):
 def handle_mining(ship):
     if (not ship.target) or not isinstance(ship.target, Planet):
         try:
-            ship.target = ship.closest_planet(where=lambda p: p.is_mineable())
+            ship.target = (ship.map.forecast.target(ship) if ship.map.forecast else None) \
+                or ship.closest_planet(among=ship.map.mineable_planets())
         except IndexError:
             # no more planets to mine
             ship.task = IS.FREE
@@ -67,9 +109,9 @@ def handle_invading(ship):
     # INVADING - add to target's invasion forces
     if not ship.target:
         try:
-            ship.target = ship.closest_planet(where=lambda p: p.is_someone_elses())
+            ship.target = most_valuable_planet(ship, ship.map.enemy_planets())
         except IndexError:
-            ship.target = ship.closest_planet(where=lambda p: p.is_mine())
+            ship.target = ship.closest_planet(among=ship.map.my_planets())
 
     if ship.target.is_mineable():
         ship.task = IS.MINING
@@ -83,7 +125,7 @@ def handle_defending(ship):
     # Assign a reasonable target
     if not ship.target or not isinstance(ship.target, Planet):
         try:  # find planet to defend
-            ship.target = ship.closest_planet(where=lambda p: p.is_mine())
+            ship.target = ship.closest_planet(among=ship.map.my_planets())
         except IndexError:
             # TODO: what to do when we don't have anymore planets
             logging.info("handle_defending: Could not find planet to defend.")
@@ -123,7 +165,7 @@ def handle_crashing(ship):
     #
     # Crashing into a PLANET
     #
-    if ship.target.is_mine():
+    if not ship.target or ship.target.is_mine():
         ship.target = None
         ship.task = IS.FREE
     else:
@@ -134,22 +176,101 @@ def handle_kamikaze(ship):
     #
     # Crashing into a SHIP
     #
-    if ship.target.is_mine():
+    if not ship.target or ship.target.is_mine():
         # change course?
         ship.target = None
         ship.task = IS.FREE  # maybe find someone else?
     else:
-        ship.navigate(ship.target)  # TODO: crash where this ship WILL BE.
+        # crash where the target will be by the time we get there
+        ship.navigate(intercept.aim(ship, ship.target))
+
+
+def handle_attacking(ship):
+    #
+    # Fighting an enemy SHIP (weapons fire on their own once in range)
+    #
+    if not ship.target or ship.target.is_mine() or not hasattr(ship.target, "docking_status"):
+        enemies = [s for s in ship.map.nearby_ships(ship) if s.is_someone_elses()]
+        if not enemies:
+            ship.task = IS.FREE
+            ship.target = None
+            return None
+        ship.target = intercept.earliest([ship], enemies, ship.map)[0]
+    # meet it where it will be, not where it is
+    ship.navigate(ship.closest_point_to(intercept.aim(ship, ship.target), gap=ship.target.radius + 1))
+
 
+#: Handler for each task, indexed by IS
+HANDLERS = (
+    handle_free,
+    handle_defending,
+    handle_mining,
+    handle_invading,
+    handle_crashing,
+    handle_kamikaze,
+    handle_attacking,
+)
 
-class IS(Enum):
-    FREE = handle_free
 
-    DEFENDING = handle_defending  # planet
+def resolve(ship):
+    """
+    Run ship's task handler until its task stops changing. A ship that
+    comes back to a task it already ran this turn with the same target, or
+    that changes task more than MAX_TRANSITIONS times, is left on its
+    current task (to run next turn) rather than looping. A task coming back
+    with a new target (e.g. MINING -> FREE -> MINING once the planet mined
+    fills up) runs again.
+    """
+    task = ship.task
+    seen = set()  # (task, target) pairs already run this turn
+    for _ in range(MAX_TRANSITIONS):
+        seen.add((task, ship.target))
+        HANDLERS[task](ship)
+        new = ship.task
+        if new == task:
+            return
+        if (new, ship.target) in seen:
+            logging.info("{}: task cycle back to {}, stopping".format(ship, new.name))
+            return
+        ship.command = None  # the new task decides what the ship does
+        task = new
+    logging.info("{}: over {} task changes, stopping".format(ship, MAX_TRANSITIONS))
 
-    MINING = handle_mining
 
-    INVADING = handle_invading  # targeting planets
+def resolve_all(ships):
+    """
+    resolve() every ship, running all ships on the same task together, one
+    task at a time: each round runs the ships whose task changed in the
+    round before. A ship whose handler raises is logged and skipped.
+    """
+    pending = {}
+    seen = {}
+    for ship in ships:
+        pending.setdefault(ship.task, []).append(ship)
+        seen[ship] = set()
 
-    CRASHING = handle_crashing  # colliding with planets
-    KAMIKAZE = handle_kamikaze  # colliding with ships
+    for _ in range(MAX_TRANSITIONS):
+        if not pending:
+            return
+        moved = {}
+        for task in sorted(pending):
+            handler = HANDLERS[task]
+            for ship in pending[task]:
+                seen[ship].add((task, ship.target))
+                try:
+                    handler(ship)
+                except Exception:
+                    logging.exception("{}: {} failed".format(ship, task.name))
+                    continue
+                new = ship.task
+                if new == task:
+                    continue
+                if (new, ship.target) in seen[ship]:
+                    logging.info("{}: task cycle back to {}, stopping".format(ship, new.name))
+                    continue
+                ship.command = None
+                moved.setdefault(new, []).append(ship)
+        pending = moved
+    for group in pending.values():
+        for ship in group:
+            logging.info("{}: over {} task changes, stopping".format(ship, MAX_TRANSITIONS))
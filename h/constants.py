@@ -31,5 +31,8 @@ DOCK_TURNS = 5
 #: Number of production units per turn contributed by each docked ship
 BASE_PRODUCTIVITY = 6
 
+#: Production units a planet spends to spawn a ship
+PRODUCTION_PER_SHIP = 72
+
 #: Distance from the planets edge at which new ships are created
 SPAWN_RADIUS = 2.0
@@ -0,0 +1,100 @@
+# defense.py
+
+from array import array
+import math
+
+from . import constants
+from .entity import Position
+from .game_map import THREAT_RANGE
+from .ship import Ship
+
+
+#: Threats per planet guard spots are placed against, nearest first
+MAX_THREATS = 4
+
+#: How far out from a docked ship, toward a threat, a guard spot is put
+GUARD_OFFSET = constants.WEAPON_RADIUS / 2
+
+#: Room kept between a guard spot and the planet's surface
+CLEARANCE = constants.SHIP_RADIUS + 1
+
+
+def _threats(planet, enemies):
+    reach = planet.radius + THREAT_RANGE
+    near = [s for s in enemies if planet - s <= reach]
+    near.sort(key=lambda s: planet - s)
+    return near[:MAX_THREATS]
+
+
+def guard_positions(game_map, planets):
+    """
+    Spread the defenders (planet.forces) of each planet between its docked
+    ships and the enemy ships closing in on it. Guard spots are candidates
+    GUARD_OFFSET out from every docked ship toward every threat; each
+    defender in turn takes the spot covering the most not yet covered docked
+    ships within WEAPON_RADIUS (ties to the spot nearest a free defender).
+    Once every docked ship is covered, covering starts over; no spot is
+    taken twice while there are untaken ones, so extra defenders spread out
+    instead of piling onto one. All planets' candidates are laid out in
+    flat arrays and solved in one pass.
+
+    :param list[Planet] planets: Our planets to guard
+    :return: Where each defender should go
+    :rtype: dict[Ship, Position]
+    """
+    enemies = [s for player in game_map.all_players() if player.id != game_map.my_id
+               for s in game_map.ships_with(player.id, Ship.DockingStatus.UNDOCKED)]
+
+    # candidate spots and the docked ships they cover, for all planets
+    xs = array('d')
+    ys = array('d')
+    covers = []  # docked ship indexes (into that planet's list) per candidate
+    jobs = []
+    for planet in planets:
+        docked = [s for s in planet.all_docked_ships() if s is not None]
+        threats = _threats(planet, enemies)
+        defenders = list(planet.forces)
+        if not docked or not threats or not defenders:
+            continue
+        first = len(xs)
+        for d in docked:
+            for t in threats:
+                dist = max(d - t, 1e-6)
+                x = d.x + (t.x - d.x) / dist * GUARD_OFFSET
+                y = d.y + (t.y - d.y) / dist * GUARD_OFFSET
+                # keep off the planet
+                out = math.hypot(x - planet.x, y - planet.y)
+                least = planet.radius + CLEARANCE
+                if out < least:
+                    x = planet.x + (x - planet.x) / max(out, 1e-6) * least
+                    y = planet.y + (y - planet.y) / max(out, 1e-6) * least
+                xs.append(x)
+                ys.append(y)
+                covers.append([k for k, other in enumerate(docked)
+                               if math.hypot(other.x - x, other.y - y) <= constants.WEAPON_RADIUS])
+        jobs.append((first, len(xs), docked, defenders))
+
+    spots = {}
+    for first, last, docked, defenders in jobs:
+        uncovered = set(range(len(docked)))
+        taken = set()
+        free = defenders
+        while free:
+            if not uncovered:
+                uncovered = set(range(len(docked)))
+            if len(taken) == last - first:
+                taken = set()
+            best, best_key, best_ship = None, None, None
+            for c in range(first, last):
+                if c in taken:
+                    continue
+                gain = len(uncovered.intersection(covers[c]))
+                ship = min(free, key=lambda s: (s.x - xs[c]) ** 2 + (s.y - ys[c]) ** 2)
+                key = (gain, -math.hypot(ship.x - xs[c], ship.y - ys[c]))
+                if best_key is None or key > best_key:
+                    best, best_key, best_ship = c, key, ship
+            spots[best_ship] = Position(xs[best], ys[best])
+            taken.add(best)
+            uncovered.difference_update(covers[best])
+            free = [s for s in free if s is not best_ship]
+    return spots
@@ -3,6 +3,8 @@ import abc
 import math
 import logging
 
+from .params import PARAMS
+
 
 class Entity:
     """
@@ -56,7 +58,7 @@ class Entity:
     # MAPS
     #
 
-    def closest_point_to(self, target, gap=2.5):
+    def closest_point_to(self, target, gap=PARAMS["approach_gap"]):
         """
         Find the closest point to the given ship near the given target,
         outside its given radius, with an added fudge of gap.
@@ -68,16 +70,29 @@ class Entity:
 
         return Position(x, y)
 
-    def nearby_planets_by_distance(self, where=None):
-        planets = None
-        if where:
-            planets = list(filter(where, self.map.nearby_planets_by_distance(self)))
+    def nearby_planets_by_distance(self, where=None, among=None):
+        """
+        Planets sorted by distance, optionally only those among a subset
+        (such as one of the Map's planet indexes) and/or passing where.
+        """
+        if among is not None:
+            planets = sorted((p for p in among if p is not self), key=lambda p: p - self)
         else:
-            planets = list(self.map.nearby_planets_by_distance(self))
+            planets = self.map.nearby_planets_by_distance(self)
+        if where:
+            planets = list(filter(where, planets))
         return planets
 
-    def closest_planet(self, where=None):
-        return self.nearby_planets_by_distance(where=where)[0]
+    def closest_planet(self, where=None, among=None):
+        """
+        Nearest planet, like nearby_planets_by_distance(...)[0]. Raises
+        IndexError if there is none.
+        """
+        planets = self.map.all_planets() if among is None else among
+        candidates = [p for p in planets if p is not self and (not where or where(p))]
+        if not candidates:
+            raise IndexError("no planet matches")
+        return min(candidates, key=lambda p: p - self)
 
     #
     # REPRESENTATIONS
@@ -85,7 +100,7 @@ class Entity:
 
     def __str__(self):
         return "{}.{}{}".format(self.__class__.__name__, self.id,
-            self.task.__name__.replace("handle_", " ") if hasattr(self, "task") else "")
+            " " + self.task.name.lower() if hasattr(self, "task") else "")
 
     __repr__ = __str__
 
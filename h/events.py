@@ -0,0 +1,106 @@
+# events.py
+
+from collections import namedtuple
+
+from .entity import Entity
+from .planet import Planet
+from .ship import Ship
+from .snapshot import NOBODY
+
+
+#: Event kinds
+PLANET_OWNER_CHANGED = "owner changed"  # also when the planet was destroyed
+PLANET_FULL = "full"
+SHIP_DESTROYED = "destroyed"
+ENEMY_NEAR_PLANET = "enemy near"
+
+Event = namedtuple("Event", "kind kind_of id")
+Event.__doc__ = """
+Something that happened to the planet or ship (kind_of) with the given id
+between the previous frame and this one.
+"""
+
+
+class Events:
+    """
+    Events found by diffing each frame against the previous one (see
+    Map.previous). Our ships are subscribed to the events of their current
+    target: when one fires, the ship's target is cleared so its task handler
+    plans again; every other ship keeps its target, rebound to this frame's
+    object, and with it its plan.
+    """
+
+    def __init__(self, radius):
+        """
+        :param float radius: Distance from a planet's surface at which an
+            enemy ship counts as near it
+        """
+        self.radius = radius
+        self.fired = []  # this frame's events
+        self.replanned = set()  # ids of our ships whose target was cleared
+        self._near = {}  # planet id -> ids of enemy ships near it last frame
+
+    def update(self, game_map):
+        """
+        Find this frame's events and re-target our ships. Call after the
+        map is parsed and linked.
+        """
+        self.fired = self._diff(game_map)
+        fired = {(e.kind_of, e.id) for e in self.fired}
+        ships = {s.id: s for s in game_map.all_ships()}
+        for e in self.fired:
+            if e.kind is SHIP_DESTROYED:
+                Entity._memory.pop(e.id, None)  # forget its task and target
+
+        self.replanned = set()
+        for ship in game_map.get_me().all_ships():
+            target = ship.target
+            if isinstance(target, Planet):
+                kind_of, current = Planet, game_map.get_planet(target.id)
+            elif isinstance(target, Ship):
+                kind_of, current = Ship, ships.get(target.id)
+            else:
+                continue  # nothing, or a plain position
+            if current is None or (kind_of, target.id) in fired:
+                ship.target = None
+                self.replanned.add(ship.id)
+            else:
+                ship.target = current
+
+    def _diff(self, game_map):
+        events = []
+        near = self._nearby(game_map)
+        before = game_map.previous
+        if before is not None:
+            for p in before.planets:
+                planet = game_map.get_planet(p.id)
+                owner = NOBODY if planet is None or planet.owner is None else planet.owner.id
+                if owner != p.owner:
+                    events.append(Event(PLANET_OWNER_CHANGED, Planet, p.id))
+                elif planet.is_full() and len(p.docked_ship_ids) < p.num_docking_spots:
+                    events.append(Event(PLANET_FULL, Planet, p.id))
+            for s in before.ships:
+                player = game_map.get_player(s.owner)
+                if player is None or player.get_ship(s.id) is None:
+                    events.append(Event(SHIP_DESTROYED, Ship, s.id))
+            for planet_id, ids in near.items():
+                if ids - self._near.get(planet_id, frozenset()):
+                    events.append(Event(ENEMY_NEAR_PLANET, Planet, planet_id))
+        self._near = near
+        return events
+
+    def _nearby(self, game_map):
+        """
+        Ids of the undocked enemy ships near each planet.
+        """
+        enemies = [s for player in game_map.all_players() if player.id != game_map.my_id
+                   for s in game_map.ships_with(player.id, Ship.DockingStatus.UNDOCKED)]
+        near = {}
+        for planet in game_map.all_planets():
+            reach = planet.radius + self.radius
+            ids = frozenset(s.id for s in enemies
+                            if abs(s.x - planet.x) <= reach and abs(s.y - planet.y) <= reach
+                            and planet - s <= reach)
+            if ids:
+                near[planet.id] = ids
+        return near
@@ -0,0 +1,162 @@
+# forecast.py
+
+from array import array
+
+from . import constants
+from .ship import Ship
+
+
+#: Turns of production forecast kept per planet
+HORIZON = 20
+
+
+class Outlook:
+    """
+    What one planet will produce: production per turn for the next HORIZON
+    turns (index 0 is the coming turn), the turns until each ship it will
+    spawn in that time, and the state its next frame should be in if
+    nothing unforeseen happens.
+    """
+    __slots__ = ("owner", "production", "spawns", "expected")
+
+    def __init__(self, owner, production, spawns, expected):
+        self.owner = owner
+        self.production = production
+        self.spawns = spawns
+        self.expected = expected
+
+
+def _state(planet):
+    """
+    What a forecast depends on: owner, stored production and the docked and
+    docking ships with their docking progress.
+    """
+    docked = tuple(sorted(
+        (s.id, s.docking_status.value, s._docking_progress)
+        for s in planet.all_docked_ships()
+        if s is not None and s.docking_status in (Ship.DockingStatus.DOCKED, Ship.DockingStatus.DOCKING)))
+    return planet.owner.id if planet.owner is not None else None, planet.current_production, docked
+
+
+def _outlook(owner, current, docked):
+    """
+    Forecast a planet from its state: each docked ship adds
+    BASE_PRODUCTIVITY a turn, docking ships once their progress runs out,
+    and a ship spawns whenever PRODUCTION_PER_SHIP has built up.
+    """
+    production = array('d', bytes(8 * HORIZON))
+    spawns = []
+    stored = current
+    for t in range(HORIZON):
+        producing = sum(1 for _, status, progress in docked
+                        if status == Ship.DockingStatus.DOCKED.value or progress <= t)
+        production[t] = producing * constants.BASE_PRODUCTIVITY
+        stored += production[t]
+        if stored >= constants.PRODUCTION_PER_SHIP:
+            stored -= constants.PRODUCTION_PER_SHIP
+            spawns.append(t + 1)
+    return Outlook(owner, production, spawns, _expect(owner, current, docked, production[0]))
+
+
+def _expect(owner, current, docked, produced):
+    """
+    The state of the next frame, if all goes to plan.
+    """
+    current += produced
+    if current >= constants.PRODUCTION_PER_SHIP:
+        current -= constants.PRODUCTION_PER_SHIP
+    docked = tuple(
+        (sid, status, progress) if status == Ship.DockingStatus.DOCKED.value
+        else (sid, Ship.DockingStatus.DOCKED.value, 0) if progress <= 1
+        else (sid, status, progress - 1)
+        for sid, status, progress in docked)
+    return owner, current, docked
+
+
+class ProductionForecast:
+    """
+    Production and spawn forecasts for every planet, kept on the Map across
+    turns. Each frame a planet whose state is what its forecast expected has
+    its forecast moved on by a turn; only planets where something else
+    happened (a ship docked, undocked or died, the owner changed) are
+    forecast again. The Map only invalidate()s it each frame; the update
+    runs on the first query after that, so frames nobody asks about cost
+    nothing (a planet's forecast is then made again from scratch).
+    """
+
+    def __init__(self):
+        self._outlooks = {}
+        self._frame = None  # map of a frame not forecast yet
+        self.recomputed = 0  # planets forecast from scratch last update
+
+    def invalidate(self, game_map):
+        """
+        Called when game_map has parsed a new frame.
+        """
+        self._frame = game_map
+
+    def _current(self):
+        if self._frame is not None:
+            game_map, self._frame = self._frame, None
+            self.update(game_map)
+        return self._outlooks
+
+    def update(self, game_map):
+        self.recomputed = 0
+        outlooks = {}
+        for planet in game_map.all_planets():
+            state = _state(planet)
+            outlook = self._outlooks.get(planet.id)
+            if outlook is not None and outlook.expected == state:
+                outlooks[planet.id] = self._advance(outlook)
+            else:
+                outlooks[planet.id] = _outlook(*state)
+                self.recomputed += 1
+        self._outlooks = outlooks
+
+    @staticmethod
+    def _advance(outlook):
+        owner, current, docked = outlook.expected
+        rate = len(docked) * constants.BASE_PRODUCTIVITY  # all docked by the horizon's end
+        production = outlook.production[1:]
+        production.append(rate)
+        spawns = [t - 1 for t in outlook.spawns if t > 1]
+        # a spawn that now falls within the horizon
+        stored = current + sum(production) - constants.PRODUCTION_PER_SHIP * len(spawns)
+        if stored >= constants.PRODUCTION_PER_SHIP:
+            spawns.append(HORIZON)
+        return Outlook(owner, production, spawns, _expect(owner, current, docked, production[0]))
+
+    #
+    # QUERIES
+    #
+
+    def production(self, planet, turns=HORIZON):
+        """
+        Production units planet will make over the next turns (at most
+        HORIZON).
+        """
+        outlook = self._current().get(planet.id)
+        return sum(outlook.production[:turns]) if outlook else 0
+
+    def next_spawn(self, planet):
+        """
+        Turns until planet spawns its next ship, or None if it will not
+        within HORIZON turns.
+        """
+        outlook = self._current().get(planet.id)
+        return outlook.spawns[0] if outlook and outlook.spawns else None
+
+    def spawns(self, player_id, turns=HORIZON):
+        """
+        Ships player will spawn over the next turns, over all its planets.
+        """
+        return sum(1 for o in self._current().values() if o.owner == player_id
+                   for t in o.spawns if t <= turns)
+
+    def player_production(self, player_id, turns=HORIZON):
+        """
+        Production units player will make over the next turns.
+        """
+        return sum(sum(o.production[:turns]) for o in self._current().values()
+                   if o.owner == player_id)
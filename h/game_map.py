@@ -1,11 +1,25 @@
 from . import collision
 from .entity import Position
+from .paths import PathCache
+from .history import History
+from .events import Events
+from .snapshot import Snapshot
+from .pool import EntityPool
+from .precision import Precision
+from .forecast import ProductionForecast
 from .planet import Planet
 from .ship import Ship
+from . import constants
 
+from contextlib import contextmanager
 import logging
 
 
+#: Docked ships are scheduled when an enemy ship gets this close to their
+#: planet's surface: two turns of movement plus weapon range
+THREAT_RANGE = 2 * constants.MAX_SPEED + constants.WEAPON_RADIUS
+
+
 class Map:
     """
     Map which houses the current game information/metadata.
@@ -20,6 +34,24 @@ class Map:
         self.height = height
         self._players = {}
         self._planets = {}
+        self.paths = PathCache()  # kept across turns, see paths.py
+        self.graph = None  # navgraph.VisibilityGraph, built by Game
+        self.history = History()  # enemy tracks across turns
+        self.previous = None  # Snapshot of the previous frame
+        self.events = Events(THREAT_RANGE)  # what changed since previous
+        self.forecast = None  # speculate.Forecast of this frame, if any
+        self.navigator = None  # parallel.NavigationPool, if Game started one
+        self.precision = Precision()  # navigation settings, tuned by Game
+        self.production = ProductionForecast()  # planet production and spawns
+        self.pool = EntityPool()  # recycles ships between frames
+
+        # per-frame indexes, rebuilt by _link
+        self._empty_planets = []
+        self._my_planets = []
+        self._enemy_planets = []
+        self._mineable_planets = []
+        self._ships_by_status = {}
+        self._threatened = set()
 
     #
     # PLAYERS
@@ -62,10 +94,52 @@ class Map:
             results = list(filter(lambda s: s not in exclude, results))
         return results
 
+    def empty_planets(self):
+        """
+        Lists planets nobody owns
+        """
+        return self._empty_planets
+
+    def my_planets(self):
+        """
+        Lists planets we own
+        """
+        return self._my_planets
+
+    def enemy_planets(self):
+        """
+        Lists planets someone else owns
+        """
+        return self._enemy_planets
+
+    def mineable_planets(self):
+        """
+        Lists planets we can dock at: empty ones, and ours with free spots
+        """
+        return self._mineable_planets
+
     #
     # SHIPS
     #
 
+    def ships_with(self, player_id, docking_status):
+        """
+        Lists the ships of a player in the given Ship.DockingStatus
+        """
+        return self._ships_by_status.get((player_id, docking_status), [])
+
+    def active_ships(self):
+        """
+        Lists our ships that need a decision this turn (see _schedule)
+        """
+        return self.get_me().active_ships()
+
+    def is_threatened(self, planet):
+        """
+        Whether an enemy ship is within THREAT_RANGE of planet this turn
+        """
+        return planet.id in self._threatened
+
     def all_ships(self, exclude=None):
         all_ships = []
         for player in self.all_players():
@@ -143,17 +217,57 @@ class Map:
             key=lambda e: e - entity
         )
 
+    def flush_navigation(self):
+        """
+        Steer the ships whose navigation was deferred to the navigator, if
+        there is one. Call once all ships have navigated.
+        """
+        if self.navigator is not None:
+            self.navigator.flush(self)
+
+    @contextmanager
+    def navigating_now(self):
+        """
+        Ships navigate right away within the block instead of deferring to
+        the navigator, for callers that need the command at once.
+        """
+        navigator, self.navigator = self.navigator, None
+        try:
+            yield
+        finally:
+            self.navigator = navigator
+
     #
     # LINKING AND PARSING
     #
 
     def _link(self):
         """
-        Updates all the entities with the correct ship and planet objects
+        Updates all the entities with the correct ship and planet objects,
+        and rebuilds the planet and ship indexes in the same pass
         """
-        for celestial_object in self.all_planets() + self.all_ships():
-            celestial_object._link(self)
-            celestial_object.map = self
+        self._empty_planets = []
+        self._my_planets = []
+        self._enemy_planets = []
+        self._mineable_planets = []
+        for planet in self.all_planets():
+            planet._link(self)
+            planet.map = self
+            if planet.owner is None:
+                self._empty_planets.append(planet)
+                self._mineable_planets.append(planet)
+            elif planet.owner.id == self.my_id:
+                self._my_planets.append(planet)
+                if not planet.is_full():
+                    self._mineable_planets.append(planet)
+            else:
+                self._enemy_planets.append(planet)
+
+        self._ships_by_status = {}
+        for ship in self.all_ships():
+            ship._link(self)
+            ship.map = self
+            self._ships_by_status.setdefault((ship.owner.id, ship.docking_status), []).append(ship)
 
     def _parse(self, map_string):
         """
@@ -164,11 +278,52 @@ class Map:
         """
         tokens = map_string.split()
 
-        self._players, tokens = Player._parse(tokens)
+        if self._players:
+            self.previous = Snapshot.of(self)
+        self.pool.begin_frame()
+        self._players, tokens = Player._parse(tokens, self.pool)
         self._planets, tokens = Planet._parse(tokens)
 
         assert(len(tokens) == 0)  # There should be no remaining tokens at this point
         self._link()
+        self.paths.update(self)
+        if self.forecast:
+            self.forecast.apply(self)
+        self.history.update(self)
+        self.production.invalidate(self)
+        self.events.update(self)
+        self._schedule()
+
+    def _schedule(self):
+        """
+        Picks our ships that need a decision this turn: undocked ones,
+        newly spawned ones, ones whose docking status changed since the last
+        frame or whose target an event cleared, and ones docked at a planet
+        an enemy is closing in on. The
+        rest are docked or docking with nothing new to decide.
+        """
+        me = self.get_me()
+        enemies = [s for player in self.all_players() if player.id != self.my_id
+                   for s in self.ships_with(player.id, Ship.DockingStatus.UNDOCKED)]
+        threatened = self.forecast.threat_map(self, enemies) if self.forecast else None
+        if threatened is None:
+            threatened = set()
+            for planet in self._my_planets:
+                reach = planet.radius + THREAT_RANGE
+                if any(planet - s <= reach for s in enemies):
+                    threatened.add(planet.id)
+        self._threatened = threatened
+
+        active = []
+        for ship in me.all_ships():
+            if ship.docking_status is not Ship.DockingStatus.UNDOCKED:
+                before = self.previous.get_ship(ship.id) if self.previous else None
+                if (before is not None and before.docking_status == ship.docking_status.value
+                        and ship.id not in self.events.replanned
+                        and (ship.planet is None or ship.planet.id not in self._threatened)):
+                    continue
+            active.append(ship)
+        me._active = active
 
 
 class Player:
@@ -182,6 +337,7 @@ class Player:
         """
         self.id = player_id
         self._ships = ships
+        self._active = None  # set by Map._schedule, for our player
 
     #
     # SHIPS
@@ -194,6 +350,14 @@ class Player:
         """
         return list(self._ships.values())
 
+    def active_ships(self):
+        """
+        :return: The ships that need a decision this turn, or all of them if
+            the map has not scheduled this player
+        :rtype: list[entity.Ship]
+        """
+        return self.all_ships() if self._active is None else self._active
+
     def get_ship(self, ship_id):
         """
         :param int ship_id: The ship id of the desired ship.
@@ -217,26 +381,28 @@ class Player:
     #
 
     @staticmethod
-    def _parse_single(tokens):
+    def _parse_single(tokens, pool=None):
         """
         Parse one user given an input string from the Halite engine.
 
         :param list[str] tokens: The input string as a list of str from the Halite engine.
+        :param pool.EntityPool pool: Where to recycle ship objects from (optional)
         :return: The parsed player id, player object, and remaining tokens
         :rtype: (int, Player, list[str])
         """
         player_id, *remainder = tokens
         player_id = int(player_id)
-        ships, remainder = Ship._parse(player_id, remainder)
+        ships, remainder = Ship._parse(player_id, remainder, pool)
         player = Player(player_id, ships)
         return player_id, player, remainder
 
     @staticmethod
-    def _parse(tokens):
+    def _parse(tokens, pool=None):
         """
         Parse an entire user input string from the Halite engine for all users.
 
         :param list[str] tokens: The input string as a list of str from the Halite engine.
+        :param pool.EntityPool pool: Where to recycle ship objects from (optional)
         :return: The parsed players in the form of player dict, and remaining tokens
         :rtype: (dict, list[str])
         """
@@ -245,6 +411,6 @@ class Player:
         players = {}
 
         for _ in range(num_players):
-            player, players[player], remainder = Player._parse_single(remainder)
+            player, players[player], remainder = Player._parse_single(remainder, pool)
 
         return players, remainder
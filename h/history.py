@@ -0,0 +1,169 @@
+# history.py
+
+from array import array
+from collections import Counter
+import math
+
+from .entity import Position
+
+
+#: Frames of enemy ship positions remembered per ship
+FRAMES = 8
+
+#: Weight of the newest frame in the per-opponent running estimates
+SMOOTHING = 0.2
+
+#: Turns ahead used to guess which planet a moving ship is heading for
+LOOKAHEAD = 5
+
+
+class Track:
+    """
+    The last FRAMES positions of one ship, in a fixed-size ring buffer.
+    """
+    __slots__ = ("_xs", "_ys", "_head", "size", "seen")
+
+    def __init__(self):
+        self._xs = array('d', bytes(8 * FRAMES))
+        self._ys = array('d', bytes(8 * FRAMES))
+        self._head = -1
+        self.size = 0
+        self.seen = 0  # frame this track was last written
+
+    def push(self, x, y, frame):
+        self._head = (self._head + 1) % FRAMES
+        self._xs[self._head] = x
+        self._ys[self._head] = y
+        self.size = min(self.size + 1, FRAMES)
+        self.seen = frame
+
+    def position(self, back=0):
+        """
+        Position from back frames ago (0 is the latest).
+        """
+        i = (self._head - back) % FRAMES
+        return self._xs[i], self._ys[i]
+
+    def velocity(self, window=3):
+        """
+        Average displacement per frame over the last window frames.
+        """
+        back = min(window, self.size - 1)
+        if back < 1:
+            return 0.0, 0.0
+        x0, y0 = self.position(back)
+        x1, y1 = self.position()
+        return (x1 - x0) / back, (y1 - y0) / back
+
+
+class Profile:
+    """
+    Running estimates of how one opponent plays.
+
+    :ivar rush: Share of its undocked ships closing in on our fleet (0..1)
+    :ivar expand: Share of its ships docked or docking (0..1)
+    :ivar targets: Counts of planets its moving ships were heading for
+    """
+
+    def __init__(self, player_id):
+        self.id = player_id
+        self.rush = 0.0
+        self.expand = 0.0
+        self.targets = Counter()
+
+    def is_rushing(self):
+        return self.rush > self.expand
+
+    def preferred_targets(self, n=3):
+        return [planet_id for planet_id, _ in self.targets.most_common(n)]
+
+    def __str__(self):
+        return "Profile {} rush={:.2f} expand={:.2f}".format(self.id, self.rush, self.expand)
+
+    __repr__ = __str__
+
+
+class History:
+    """
+    Enemy ship tracks and opponent profiles, kept on the (persistent) Map
+    and updated once per frame. Tracks of destroyed ships are dropped, so
+    memory stays proportional to the ships alive.
+    """
+
+    def __init__(self):
+        self.frame = 0
+        self._tracks = {}
+        self._profiles = {}
+
+    def track(self, ship):
+        return self._tracks.get(ship.id)
+
+    def profile(self, player_id):
+        return self._profiles.get(player_id)
+
+    def all_profiles(self):
+        return list(self._profiles.values())
+
+    def velocity(self, ship):
+        """
+        Velocity of ship per turn: as parsed if the engine reports one, else
+        estimated from its track.
+        """
+        if ship.vel_x or ship.vel_y:
+            return ship.vel_x, ship.vel_y
+        track = self._tracks.get(ship.id)
+        return track.velocity() if track else (0.0, 0.0)
+
+    def predict(self, ship, turns=1):
+        """
+        Where ship will be after turns, extrapolating its velocity.
+        """
+        vx, vy = self.velocity(ship)
+        return Position(ship.x + vx * turns, ship.y + vy * turns)
+
+    def update(self, game_map):
+        """
+        Record the current frame. Called after every parse.
+        """
+        self.frame += 1
+        me = game_map.get_me()
+        mine = me.all_ships() if me else []
+        cx = sum(s.x for s in mine) / len(mine) if mine else None
+        cy = sum(s.y for s in mine) / len(mine) if mine else None
+        planets = game_map.all_planets()
+
+        for player in game_map.all_players():
+            if player is me:
+                continue
+            ships = player.all_ships()
+            profile = self._profiles.get(player.id)
+            if profile is None:
+                profile = self._profiles[player.id] = Profile(player.id)
+
+            docked = closing = moving = 0
+            for ship in ships:
+                track = self._tracks.get(ship.id)
+                if track is None:
+                    track = self._tracks[ship.id] = Track()
+                track.push(ship.x, ship.y, self.frame)
+
+                if ship.docking_status is not ship.DockingStatus.UNDOCKED:
+                    docked += 1
+                    continue
+                vx, vy = self.velocity(ship)
+                if math.hypot(vx, vy) < 1:
+                    continue
+                moving += 1
+                if cx is not None and vx * (cx - ship.x) + vy * (cy - ship.y) > 0:
+                    closing += 1
+                if planets:
+                    ahead = Position(ship.x + vx * LOOKAHEAD, ship.y + vy * LOOKAHEAD)
+                    profile.targets[min(planets, key=lambda p: p - ahead).id] += 1
+
+            if ships:
+                profile.expand += SMOOTHING * (docked / len(ships) - profile.expand)
+                profile.rush += SMOOTHING * ((closing / moving if moving else 0) - profile.rush)
+
+        for ship_id in [i for i, t in self._tracks.items() if t.seen != self.frame]:
+            del self._tracks[ship_id]
+
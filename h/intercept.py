@@ -0,0 +1,94 @@
+# intercept.py
+
+from array import array
+import math
+
+from . import constants
+from .entity import Position
+
+
+#: Intercepts further off than this many turns are treated as unreachable;
+#: the target would have changed course long before
+HORIZON = 30
+
+
+def intercept_time(dx, dy, vx, vy, speed=constants.MAX_SPEED):
+    """
+    Earliest t >= 0 at which a pursuer moving at speed can be where a target
+    offset (dx, dy) from it and moving at (vx, vy) per turn will be, i.e. the
+    smallest non-negative root of |(dx, dy) + (vx, vy) t| = speed t. Returns
+    math.inf if the target can never be caught.
+    """
+    c = dx * dx + dy * dy
+    if c == 0:
+        return 0.0
+    a = vx * vx + vy * vy - speed * speed
+    b = 2 * (dx * vx + dy * vy)
+    if abs(a) < 1e-9:
+        # as fast as us: only catchable head on
+        return -c / b if b < 0 else math.inf
+    disc = b * b - 4 * a * c
+    if disc < 0:
+        return math.inf
+    root = math.sqrt(disc)
+    best = math.inf
+    for t in ((-b - root) / (2 * a), (-b + root) / (2 * a)):
+        if 0 <= t < best:
+            best = t
+    return best
+
+
+def solve_all(pursuers, targets, game_map, speed=constants.MAX_SPEED):
+    """
+    Intercept times for every pursuer-target pair in one pass over flat
+    coordinate arrays, with target velocities from the map's history.
+    Row i holds pursuer i's times to each target, math.inf where the
+    target cannot be caught within HORIZON turns.
+
+    :rtype: list[array]
+    """
+    history = game_map.history
+    txs = array('d', (t.x for t in targets))
+    tys = array('d', (t.y for t in targets))
+    vxs = array('d', bytes(8 * len(targets)))
+    vys = array('d', bytes(8 * len(targets)))
+    for j, target in enumerate(targets):
+        vxs[j], vys[j] = history.velocity(target)
+
+    rows = []
+    for p in pursuers:
+        row = array('d', bytes(8 * len(targets)))
+        for j in range(len(targets)):
+            t = intercept_time(txs[j] - p.x, tys[j] - p.y, vxs[j], vys[j], speed)
+            row[j] = t if t <= HORIZON else math.inf
+        rows.append(row)
+    return rows
+
+
+def earliest(pursuers, targets, game_map, speed=constants.MAX_SPEED):
+    """
+    For each pursuer, the target it can catch soonest (the nearest one if
+    none can be caught).
+
+    :rtype: list[Entity]
+    """
+    chosen = []
+    for p, row in zip(pursuers, solve_all(pursuers, targets, game_map, speed)):
+        j = min(range(len(targets)), key=lambda j: (row[j], p - targets[j]))
+        chosen.append(targets[j])
+    return chosen
+
+
+def aim(ship, target, speed=constants.MAX_SPEED):
+    """
+    Where ship should head to meet target: the intercept point if target
+    can be caught within HORIZON turns, else where target will be after
+    the turns ship needs to cover the distance now between them.
+    """
+    vx, vy = ship.map.history.velocity(target)
+    t = intercept_time(target.x - ship.x, target.y - ship.y, vx, vy, speed)
+    if t > HORIZON:
+        t = math.ceil((ship - target) / speed)
+    game_map = ship.map
+    return Position(min(max(target.x + vx * t, 0), game_map.width),
+                    min(max(target.y + vy * t, 0), game_map.height))
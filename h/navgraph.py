@@ -0,0 +1,153 @@
+# navgraph.py
+
+import heapq
+import logging
+import math
+
+from . import constants
+from .entity import Position
+
+
+#: Corners of the polygon drawn around each planet
+SIDES = 6
+
+#: Clearance kept between the planet surface and the polygon's sides
+MARGIN = 1.0
+
+#: Clearance a segment needs from a planet surface to count as visible;
+#: the same fudge navigate uses for planets
+FUDGE = constants.SHIP_RADIUS + 0.1
+
+
+class VisibilityGraph:
+    """
+    Shortest planet-avoiding routes over the whole map. Planets never move,
+    so the graph is built once: every planet is wrapped in a polygon whose
+    sides stay MARGIN outside it, the polygon corners (approximate tangent
+    points) become nodes, and nodes that can see each other are joined.
+    Distances and next hops between all pairs of nodes are precomputed, so a
+    query only has to connect its two endpoints to the graph.
+    """
+
+    def __init__(self, game_map):
+        self.circles = [(p.x, p.y, p.radius + FUDGE) for p in game_map.all_planets()]
+        self.nodes = []
+        for p in game_map.all_planets():
+            reach = (p.radius + MARGIN) / math.cos(math.pi / SIDES)
+            for k in range(SIDES):
+                a = 2 * math.pi * k / SIDES
+                x = p.x + reach * math.cos(a)
+                y = p.y + reach * math.sin(a)
+                if (0 < x < game_map.width and 0 < y < game_map.height and
+                        not any((x - cx) ** 2 + (y - cy) ** 2 <= cr ** 2
+                                for cx, cy, cr in self.circles)):
+                    self.nodes.append(Position(x, y))
+
+        n = len(self.nodes)
+        self._edges = [[] for _ in range(n)]
+        for i in range(n):
+            a = self.nodes[i]
+            for j in range(i + 1, n):
+                b = self.nodes[j]
+                if self.visible(a.x, a.y, b.x, b.y):
+                    d = math.hypot(a.x - b.x, a.y - b.y)
+                    self._edges[i].append((j, d))
+                    self._edges[j].append((i, d))
+
+        self._dist = []
+        self._next = []
+        for source in range(n):
+            dist, first = self._dijkstra(source)
+            self._dist.append(dist)
+            self._next.append(first)
+        logging.info("VisibilityGraph: {} nodes, {} edges".format(
+            n, sum(len(e) for e in self._edges) // 2))
+
+    def _dijkstra(self, source):
+        """
+        Distances from source to every node, and for each node the first hop
+        taken from source on the way there.
+        """
+        n = len(self.nodes)
+        dist = [math.inf] * n
+        first = [None] * n
+        dist[source] = 0.0
+        first[source] = source
+        heap = [(0.0, source)]
+        while heap:
+            d, i = heapq.heappop(heap)
+            if d > dist[i]:
+                continue
+            for j, w in self._edges[i]:
+                nd = d + w
+                if nd < dist[j]:
+                    dist[j] = nd
+                    first[j] = j if i == source else first[i]
+                    heapq.heappush(heap, (nd, j))
+        return dist, first
+
+    def visible(self, x1, y1, x2, y2):
+        """
+        Whether the segment (x1, y1)-(x2, y2) stays clear of every planet.
+        """
+        dx = x2 - x1
+        dy = y2 - y1
+        a = dx * dx + dy * dy
+        for cx, cy, cr in self.circles:
+            # bounding box rejection first; most planets are nowhere near
+            if (cx + cr < min(x1, x2) or cx - cr > max(x1, x2) or
+                    cy + cr < min(y1, y2) or cy - cr > max(y1, y2)):
+                continue
+            t = 0.0 if a == 0 else ((cx - x1) * dx + (cy - y1) * dy) / a
+            t = max(0.0, min(t, 1.0))
+            px = x1 + t * dx - cx
+            py = y1 + t * dy - cy
+            if px * px + py * py <= cr * cr:
+                return False
+        return True
+
+    def _visible_nodes(self, point):
+        return [(i, math.hypot(node.x - point.x, node.y - point.y))
+                for i, node in enumerate(self.nodes)
+                if self.visible(point.x, point.y, node.x, node.y)]
+
+    def route(self, start, goal):
+        """
+        Shortest planet-avoiding route from start to goal, as a list of
+        waypoints ending with goal (start itself is not included). Returns
+        None if goal cannot be reached through the graph.
+        """
+        if self.visible(start.x, start.y, goal.x, goal.y):
+            return [goal]
+
+        best, via = math.inf, None
+        ends = self._visible_nodes(goal)
+        for i, di in self._visible_nodes(start):
+            dist = self._dist[i]
+            for j, dj in ends:
+                d = di + dist[j] + dj
+                if d < best:
+                    best, via = d, (i, j)
+        if via is None:
+            return None
+
+        i, j = via
+        waypoints = [self.nodes[i]]
+        while i != j:
+            i = self._next[i][j]
+            waypoints.append(self.nodes[i])
+        waypoints.append(goal)
+        return waypoints
+
+    def distance(self, start, goal):
+        """
+        Length of the shortest planet-avoiding route, or inf if none.
+        """
+        waypoints = self.route(start, goal)
+        if waypoints is None:
+            return math.inf
+        total, prev = 0.0, start
+        for point in waypoints:
+            total += math.hypot(point.x - prev.x, point.y - prev.y)
+            prev = point
+        return total
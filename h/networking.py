@@ -1,61 +1,112 @@
-import sys
 import logging
-import copy
+import time
 
 from . import game_map
+from . import pool
+from .snapshot import Snapshot
+from .transport import StdioTransport
+from .navgraph import VisibilityGraph
+from .speculate import Speculator
+from .parallel import NavigationPool
 
 
 class Game:
     """
     :ivar map: Current map representation
-    :ivar initial_map: The initial version of the map before game starts
+    :ivar initial_map: Snapshot of the map before game starts
     """
     turns = 1
 
-    @staticmethod
-    def _send_string(s):
+    #: Seconds the engine allows per turn
+    TURN_BUDGET = 2.0
+
+    #: Seconds after start-up by which the name must be sent (the engine
+    #: allows a minute); pre-game tasks not started by then are skipped
+    PREGAME_BUDGET = 40
+
+    #: Functions run with the Game once the first frame is parsed and
+    #: before the name is sent; add to it with Game.pregame
+    _pregame = []
+
+    @classmethod
+    def pregame(cls, task):
+        """
+        Register task(game) to run in the pre-game window, when there is a
+        lot more time than in any turn. Tasks run in registration order,
+        against game.map as of the first frame. Usable as a decorator.
+        """
+        cls._pregame.append(task)
+        return task
+
+    def _run_pregame(self, deadline):
+        for task in self._pregame:
+            if time.time() >= deadline:
+                logging.warning("Pre-game: out of time, skipping {}".format(task.__name__))
+                continue
+            started = time.time()
+            try:
+                task(self)
+            except Exception:
+                logging.exception("Pre-game: {} failed".format(task.__name__))
+            logging.info("Pre-game: {} took {:.3f}s".format(task.__name__, time.time() - started))
+
+    def time_left(self):
+        """
+        Seconds left of this turn, counted from when its frame was read.
+        """
+        return self.turn_started + self.TURN_BUDGET - time.time()
+
+    def deadline(self, reserve=0.0):
+        """
+        The time.time() by which to stop working on this turn, keeping
+        reserve seconds for sending commands.
+        """
+        return self.turn_started + self.TURN_BUDGET - reserve
+
+    def _send_string(self, s):
         """
         Send data to the game. Call :function:`done_sending` once finished.
 
         :param str s: String to send
         :return: nothing
         """
-        sys.stdout.write(s)
+        self._transport.write(s)
 
     def command(self, s):
-        sid = s.split(" ")[1]
+        sid = s.split(" ", 2)[1]
         if sid not in self.commands:
             self._send_string(s)
-            self.commands.append(sid)
+            self.commands.add(sid)
 
-    @staticmethod
-    def _done_sending():
+    def _done_sending(self):
         """
         Finish sending commands to the game.
 
         :return: nothing
         """
-        sys.stdout.write('\n')
-        sys.stdout.flush()
+        self._transport.write('\n')
+        self._transport.flush()
 
     def end_turn(self):
         self.turns += 1
         self._done_sending()
-        self.commands = []
-
-    @staticmethod
-    def _get_string():
+        self.map.precision.end_turn()
+        self.commands = set()
+        if self._manage_gc:
+            pool.collect_between_turns()
+        if self._speculator:
+            self._speculator.start(self.map, Snapshot.of(self.map))
+
+    def _get_string(self):
         """
         Read input from the game.
 
         :return: The input read from the Halite engine
         :rtype: str
         """
-        result = sys.stdin.readline().rstrip('\n')
-        return result
+        return self._transport.read_line()
 
-    @staticmethod
-    def send_command_queue(command_queue):
+    def send_command_queue(self, command_queue):
         """
         Issue the given list of commands.
 
@@ -63,9 +114,9 @@ class Game:
         :return: nothing
         """
         for command in command_queue:
-            Game._send_string(command)
+            self._send_string(command)
 
-        Game._done_sending()
+        self._done_sending()
 
     @staticmethod
     def _set_up_logging(tag, name):
@@ -80,33 +131,60 @@ class Game:
         logging.basicConfig(filename=log_file, level=logging.DEBUG, filemode='w')
         logging.info("Initialized bot {}".format(name))
 
-    def __init__(self, name):
+    def __init__(self, name, manage_gc=True, transport=None, speculate=False, nav_workers=0):
         """
         Initialize the bot with the given name.
 
         :param name: The name of the bot.
+        :param manage_gc: Whether to keep the garbage collector from running
+            during turns, and collect after each turn's commands are sent.
+        :param transport.Transport transport: How to talk to the engine
+            (default: stdin/stdout)
+        :param speculate: Whether to forecast the next frame on a background
+            thread while the engine runs each turn (see speculate.py).
+        :param nav_workers: Number of worker processes to steer ships with
+            (see parallel.py), or 0 to navigate in this process.
         """
+        deadline = time.time() + self.PREGAME_BUDGET
+        self._transport = transport or StdioTransport()
         self._name = name
-        self._send_name = False
         tag = int(self._get_string())
         Game._set_up_logging(tag, name)
         width, height = [int(x) for x in self._get_string().strip().split()]
         self.map = game_map.Map(tag, width, height)
-        self.update_map()
-        self.initial_map = copy.deepcopy(self.map)
-        self._send_name = True
-
-        self.commands = []
+        self.turn_started = time.time()
+        self.map._parse(self._get_string())
+        self.initial_map = Snapshot.of(self.map)
+        self.commands = set()
+        if nav_workers:
+            # before any thread is started, as the workers are forked
+            self.map.navigator = NavigationPool(nav_workers)
+        self._speculator = Speculator(game_map.THREAT_RANGE) if speculate else None
+
+        self._run_pregame(deadline)
+        self._manage_gc = manage_gc
+        if manage_gc:
+            pool.pause_gc()
+        self._send_string(self._name)
+        self._done_sending()
 
     def update_map(self):
         """
-        Parse the map given by the engine.
+        Parse the map given by the engine. Raises EOFError once the engine
+        has stopped sending frames.
         """
-        if self._send_name:
-            self._send_string(self._name)
-            self._done_sending()
-            self._send_name = False
-        else:
-            logging.info("End turn.\n\n--- TURN {} ---\n".format(self.turns))
-        self.map._parse(self._get_string())
+        logging.info("End turn.\n\n--- TURN {} ---\n".format(self.turns))
+        frame = self._get_string()
+        if not frame:
+            raise EOFError("end of input")
+        self.turn_started = time.time()
+        self.map.precision.begin_turn(self.turn_started, self.TURN_BUDGET)
+        if self._speculator:
+            self.map.forecast = self._speculator.finish()
+        self.map._parse(frame)
         return self.map
+
+
+@Game.pregame
+def build_visibility_graph(game):
+    game.map.graph = VisibilityGraph(game.map)
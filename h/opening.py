@@ -0,0 +1,71 @@
+# opening.py
+
+from . import intercept
+from .params import PARAMS
+
+
+#: Turns in which an enemy heading our way is treated as a rush
+RUSH_TURNS = 40
+
+#: Enemy ships closer than this to one of our ships or planets are threats
+RUSH_RADIUS = PARAMS["rush_radius"]
+
+#: Units per turn an enemy ship must be closing on us at to count as a
+#: rusher; ships sitting still (or just spawned) are not rushing anyone
+APPROACH_SPEED = 1.0
+
+#: Our ships sent after each rusher
+DEFENDERS = PARAMS["rush_defenders"]
+
+
+def rushing_ships(game_map, turn):
+    """
+    Enemy ships rushing us: undocked, within RUSH_RADIUS of one of our ships
+    or planets and closing on the nearest of them faster than APPROACH_SPEED,
+    during the first RUSH_TURNS turns.
+    """
+    if turn > RUSH_TURNS:
+        return []
+    me = game_map.get_me()
+    ours = me.all_ships() + game_map.my_planets()
+    rushers = []
+    for player in game_map.all_players():
+        if player is me:
+            continue
+        for ship in player.all_ships():
+            if ship.docking_status is not ship.DockingStatus.UNDOCKED:
+                continue
+            near = [e for e in ours if e - ship - e.radius < RUSH_RADIUS]
+            if not near:
+                continue
+            vx, vy = game_map.history.velocity(ship)
+            target = min(near, key=lambda e: e - ship)
+            distance = max(target - ship, 1e-6)
+            if (vx * (target.x - ship.x) + vy * (target.y - ship.y)) / distance > APPROACH_SPEED:
+                rushers.append(ship)
+    return rushers
+
+
+def rush_defenders(game_map, rushers, ships):
+    """
+    Send DEFENDERS of ships after each rusher: pursuer-rusher pairs are
+    taken soonest intercept first (nearest first among those that cannot
+    catch up) until every rusher has its defenders. The rest of the ships
+    are left to their tasks.
+
+    :return: The rusher each defender goes after
+    :rtype: dict[Ship, Ship]
+    """
+    if not rushers or not ships:
+        return {}
+    times = intercept.solve_all(ships, rushers, game_map)
+    pairs = sorted((row[j], ship - rusher, i, j)
+                   for i, (ship, row) in enumerate(zip(ships, times))
+                   for j, rusher in enumerate(rushers))
+    chase = {}
+    wanted = [DEFENDERS] * len(rushers)
+    for _, _, i, j in pairs:
+        if wanted[j] and ships[i] not in chase:
+            chase[ships[i]] = rushers[j]
+            wanted[j] -= 1
+    return chase
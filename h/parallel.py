@@ -0,0 +1,200 @@
+# parallel.py
+
+import logging
+import math
+import multiprocessing
+import time
+from multiprocessing.sharedctypes import RawArray
+
+from . import constants
+from .planet import Planet
+
+
+#: Rows in the shared entity table (x, y, radius, is_planet per row)
+MAX_ENTITIES = 4096
+
+#: Most navigation requests one flush can send to the workers; the rest
+#: are run in this process
+MAX_REQUESTS = 1024
+
+#: Requests per task sent to a worker
+CHUNK = 16
+
+#: Seconds flush() waits for the workers before steering what is left itself
+WAIT = 0.25
+
+ENTITY_FIELDS = 4
+#: ship row, target row (-1 if none), target x, target y, speed,
+#: max_corrections, angular_step, ignore_ships, lookahead
+REQUEST_FIELDS = 9
+#: turn, magnitude, angle
+RESULT_FIELDS = 3
+
+# the shared arrays, in each worker process
+_entities = _requests = _results = None
+
+
+def _share(entities, requests, results):
+    global _entities, _requests, _results
+    _entities, _requests, _results = entities, requests, results
+
+
+def _blocked(entities, n, sx, sy, ex, ey, skip, skip_target, ignore_ships):
+    """
+    collision.intersect_segment_circle of the move (sx, sy)-(ex, ey) against
+    every entity row except skip and skip_target, as Map.obstacles_between.
+    """
+    fudge = constants.SHIP_RADIUS + 0.1
+    dx = ex - sx
+    dy = ey - sy
+    a = dx * dx + dy * dy
+    for i in range(n):
+        if i == skip or i == skip_target:
+            continue
+        row = i * ENTITY_FIELDS
+        if ignore_ships and not entities[row + 3]:
+            continue
+        cx, cy, cr = entities[row], entities[row + 1], entities[row + 2]
+        if a == 0.0:
+            if math.hypot(sx - cx, sy - cy) <= cr + fudge:
+                return True
+            continue
+        b = -2 * (sx * sx - sx * ex - sx * cx + ex * cx + sy * sy - sy * ey - sy * cy + ey * cy)
+        t = min(-b / (2 * a), 1.0)
+        if t < 0:
+            continue
+        if math.hypot(sx + dx * t - cx, sy + dy * t - cy) <= cr + fudge:
+            return True
+    return False
+
+
+def steer(entities, n, requests, i):
+    """
+    The correction loop of Ship.navigate for request i, on the shared
+    arrays: turn the heading by angular_step until the move is clear.
+    Returns (magnitude, angle), or None if no heading within
+    max_corrections steps is clear.
+    """
+    row = i * REQUEST_FIELDS
+    (ship, target, tx, ty, speed, corrections, step, ignore_ships,
+     lookahead) = requests[row:row + REQUEST_FIELDS]
+    ship, target = int(ship), int(target)
+    sx = entities[ship * ENTITY_FIELDS]
+    sy = entities[ship * ENTITY_FIELDS + 1]
+    distance = math.hypot(tx - sx, ty - sy)
+    angle = math.degrees(math.atan2(ty - sy, tx - sx)) % 360
+    probe = min(distance, lookahead)
+    ex, ey = tx, ty
+    if probe < distance:
+        target = -1
+        ex = sx + math.cos(math.radians(angle)) * probe
+        ey = sy + math.sin(math.radians(angle)) * probe
+    while corrections > 0 and _blocked(entities, n, sx, sy, ex, ey, ship, target, ignore_ships):
+        target = -1  # only the original target is not an obstacle
+        angle += step
+        ex = sx + math.cos(math.radians(angle)) * probe
+        ey = sy + math.sin(math.radians(angle)) * probe
+        corrections -= 1
+    if corrections <= 0:
+        return None
+    return int(min(speed, distance)), round(angle)
+
+
+def _work(turn, n, start, stop):
+    for i in range(start, stop):
+        move = steer(_entities, n, _requests, i)
+        row = i * RESULT_FIELDS
+        _results[row:row + RESULT_FIELDS] = [turn, -1, 0] if move is None else [turn, move[0], move[1]]
+    return stop - start
+
+
+class NavigationPool:
+    """
+    Worker processes for the expensive part of navigation: the obstacle
+    correction loop. With a navigator on the map, Ship.navigate defers that
+    loop to the queue here instead of running it; flush() then writes this
+    frame's ships and planets and the queued requests into shared memory
+    (RawArrays handed to the workers when they start, so nothing is
+    pickled but chunk bounds) and has the workers steer chunks of ships in
+    parallel. Chunks not back within WAIT seconds are steered here.
+    The queue holds one request per ship; any command given to the ship
+    after it was queued (see Ship.command) cancels it.
+    """
+
+    def __init__(self, workers=None):
+        self._entities = RawArray('d', MAX_ENTITIES * ENTITY_FIELDS)
+        self._requests = RawArray('d', MAX_REQUESTS * REQUEST_FIELDS)
+        self._results = RawArray('d', MAX_REQUESTS * RESULT_FIELDS)
+        self._pool = multiprocessing.Pool(workers, initializer=_share,
+                                          initargs=(self._entities, self._requests, self._results))
+        self._queue = {}  # ship id -> request
+        self._turn = 0
+
+    def defer(self, ship, target, speed, max_corrections, angular_step, ignore_ships, lookahead):
+        """
+        Queue the navigation of ship to target for the next flush(),
+        replacing any request queued for it before.
+        """
+        self._queue[ship.id] = (ship, target, speed, max_corrections, angular_step, ignore_ships,
+                                lookahead)
+
+    def cancel(self, ship):
+        """
+        Drop the navigation queued for ship, if any.
+        """
+        self._queue.pop(ship.id, None)
+
+    def flush(self, game_map):
+        """
+        Steer every queued ship and give each its thrust command.
+        """
+        queue, self._queue = list(self._queue.values()), {}
+        if not queue:
+            return
+        self._turn += 1
+        entities = game_map.all_ships() + game_map.all_planets()
+        n = len(entities)
+        if n > MAX_ENTITIES:
+            logging.warning("Navigation pool: {} entities, steering without workers".format(n))
+            self._steer_serial(game_map, queue)
+            return
+        rows = {}
+        for i, e in enumerate(entities):
+            rows[id(e)] = i
+            self._entities[i * ENTITY_FIELDS:(i + 1) * ENTITY_FIELDS] = \
+                [e.x, e.y, e.radius, isinstance(e, Planet)]
+        shared, rest = queue[:MAX_REQUESTS], queue[MAX_REQUESTS:]
+        for i, (ship, target, speed, corrections, step, ignore_ships, lookahead) in enumerate(shared):
+            self._requests[i * REQUEST_FIELDS:(i + 1) * REQUEST_FIELDS] = \
+                [rows[id(ship)], rows.get(id(target), -1), target.x, target.y,
+                 speed, corrections, step, ignore_ships, lookahead]
+
+        started = time.time()
+        chunks = [(start, min(start + CHUNK, len(shared))) for start in range(0, len(shared), CHUNK)]
+        pending = [(chunk, self._pool.apply_async(_work, (self._turn, n) + chunk)) for chunk in chunks]
+        late = 0
+        for (start, stop), result in pending:
+            result.wait(max(0.0, started + WAIT - time.time()))
+            for i in range(start, stop):
+                row = i * RESULT_FIELDS
+                if result.ready() and self._results[row] == self._turn:
+                    move = None if self._results[row + 1] < 0 else \
+                        (self._results[row + 1], self._results[row + 2])
+                else:
+                    move = steer(self._entities, n, self._requests, i)
+                    late += 1
+                if move is not None:
+                    shared[i][0].thrust(*move)
+        if late:
+            logging.info("Navigation pool: steered {} late requests here".format(late))
+        self._steer_serial(game_map, rest)
+
+    @staticmethod
+    def _steer_serial(game_map, queue):
+        with game_map.navigating_now():
+            for ship, target, speed, corrections, step, ignore_ships, lookahead in queue:
+                ship.navigate(target, speed, max_corrections=corrections, angular_step=step,
+                              ignore_ships=ignore_ships, lookahead=lookahead)
+
+    def close(self):
+        self._pool.terminate()
@@ -0,0 +1,67 @@
+# params.py
+
+import json
+import logging
+import os
+
+
+#: Tunable strategy constants and their defaults
+DEFAULTS = {
+    # planet.forces larger than this turn from defending to invading
+    "invade_threshold": 4,
+    # distance kept from a target's surface when approaching it
+    "approach_gap": 2.5,
+    # ships this close together are planned as one squad
+    "squad_radius": 3.0,
+    # enemy ships this close to ours count as a rush in the opening
+    "rush_radius": 35,
+    # our ships sent after each enemy ship rushing us
+    "rush_defenders": 2,
+    # distance an invasion target may be further off per production unit
+    # it is forecast to make
+    "production_weight": 0.1,
+}
+
+#: Search space for arena.tuner: (low, high, type) per parameter
+RANGES = {
+    "invade_threshold": (1, 12, int),
+    "approach_gap": (1.0, 5.0, float),
+    "squad_radius": (1.5, 6.0, float),
+    "rush_radius": (15, 60, int),
+    "rush_defenders": (1, 4, int),
+    "production_weight": (0.0, 0.5, float),
+}
+
+#: Parameter file loaded at start-up; H_PARAMS in the environment overrides
+#: it, which is how the tuner hands candidates to bots it launches
+PARAMS_FILE = os.environ.get(
+    "H_PARAMS",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "params.json"))
+
+
+def load(path=PARAMS_FILE):
+    """
+    DEFAULTS updated with whatever the parameter file at path sets.
+    Unknown names are ignored; a missing file leaves the defaults.
+    """
+    params = dict(DEFAULTS)
+    try:
+        with open(path) as f:
+            loaded = json.load(f)
+    except (IOError, ValueError):
+        return params
+    for name, value in loaded.items():
+        if name in DEFAULTS:
+            params[name] = type(DEFAULTS[name])(value)
+        else:
+            logging.warning("params: ignoring unknown parameter {}".format(name))
+    return params
+
+
+def save(params, path=PARAMS_FILE):
+    with open(path, "w") as f:
+        json.dump(params, f, indent=2, sort_keys=True)
+
+
+#: The parameters in effect for this process
+PARAMS = load()
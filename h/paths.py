@@ -0,0 +1,185 @@
+# paths.py
+
+import math
+
+from . import collision
+from . import constants
+from .entity import Position
+from .planet import Planet
+
+
+#: A cached route is reused while the requested target moves less than this
+TARGET_TOLERANCE = 1.0
+
+#: A cached route is reused while the ship is this close to where we sent it
+COURSE_TOLERANCE = 0.5
+
+#: Most legs a single route may be planned with before re-planning
+MAX_WAYPOINTS = 4
+
+
+class Route:
+    """
+    A planned path for one ship: waypoints around static planet obstacles,
+    ending at the target if it could be reached within MAX_WAYPOINTS legs.
+    """
+    __slots__ = ("target", "waypoints", "expected")
+
+    def __init__(self, target, waypoints):
+        self.target = target
+        self.waypoints = waypoints
+        self.expected = None  # where the ship should be next turn
+
+    def reaches_target(self):
+        return bool(self.waypoints) and self.waypoints[-1] is self.target
+
+    def next_waypoint(self, ship, speed):
+        """
+        Drops waypoints the ship has arrived at, or will reach this turn if
+        the leg to the following waypoint is free of planets. Returns None
+        if the ship is at a waypoint but a planet blocks the next leg; the
+        route is of no more use then.
+        """
+        while len(self.waypoints) > 1 and ship - self.waypoints[0] <= speed:
+            after = self.waypoints[1]
+            if blocking_planet(ship.map, ship, after, self._goal(after)) is not None:
+                if ship - self.waypoints[0] < 1:
+                    return None
+                break
+            self.waypoints.pop(0)
+        return self.waypoints[0]
+
+    def _goal(self, waypoint):
+        """
+        The target planet if waypoint is it, which is then no obstacle.
+        """
+        return waypoint if waypoint is self.target and isinstance(waypoint, Planet) else None
+
+
+class PathCache:
+    """
+    Routes keyed by ship id, kept across turns on the (persistent) Map.
+    All routes are dropped when the set of planets changes, since planets
+    are the only static obstacles routes are planned around.
+    """
+
+    def __init__(self):
+        self._routes = {}
+        self._planets = None
+
+    def update(self, game_map):
+        """
+        Called after every parse: invalidate on planet changes, and forget
+        the routes of ships that no longer exist.
+        """
+        planets = frozenset(game_map._planets)
+        if planets != self._planets:
+            self._routes.clear()
+            self._planets = planets
+            return
+        me = game_map.get_me()
+        for ship_id in list(self._routes):
+            if me is None or me.get_ship(ship_id) is None:
+                del self._routes[ship_id]
+
+    def lookup(self, ship, target):
+        """
+        Returns the cached route for ship if it still heads to (about) the
+        same target and the ship moved where it was told to, else None.
+        """
+        route = self._routes.get(ship.id)
+        if route is None:
+            return None
+        if (route.target - target > TARGET_TOLERANCE or route.expected is None
+                or ship - route.expected > COURSE_TOLERANCE):
+            del self._routes[ship.id]
+            return None
+        if route.reaches_target():
+            route.waypoints[-1] = target
+        elif len(route.waypoints) == 1 and ship - route.waypoints[0] <= constants.MAX_SPEED:
+            del self._routes[ship.id]  # end of a partial route; plan the rest
+            return None
+        route.target = target
+        return route
+
+    def store(self, ship, target, waypoints):
+        route = Route(target, waypoints)
+        self._routes[ship.id] = route
+        return route
+
+    def forget(self, ship):
+        self._routes.pop(ship.id, None)
+
+    def __contains__(self, ship):
+        return ship.id in self._routes
+
+    def __len__(self):
+        return len(self._routes)
+
+
+def blocking_planet(game_map, start, end, exclude=None):
+    """
+    Returns the planet nearest to start that the segment start-end passes
+    through (with room for a ship), or None if the segment is clear. The
+    planet exclude (the one being navigated to) is never in the way.
+    """
+    blocker = None
+    for planet in game_map.all_planets():
+        if planet is exclude:
+            continue
+        if collision.intersect_segment_circle(start, end, planet,
+                                              fudge=constants.SHIP_RADIUS + 0.1):
+            if blocker is None or start - planet < start - blocker:
+                blocker = planet
+    return blocker
+
+
+def plan(ship, target, max_corrections=90, angular_step=1):
+    """
+    Plan waypoints from ship to target around planets. Routes come from the
+    map's visibility graph when one was built; otherwise each leg turns the
+    heading by angular_step until it clears the nearest blocking planet, and
+    ends at the first point (sampled every MAX_SPEED) from which the target
+    can be seen. Returns None if no heading within max_corrections steps is
+    clear. A target planet is not an obstacle on a leg that ends at it.
+    """
+    goal = target if isinstance(target, Planet) else None
+    graph = ship.map.graph
+    if graph is not None:
+        waypoints = graph.route(ship, target)
+        if waypoints is not None:
+            return waypoints
+
+    waypoints = []
+    start = ship
+    while len(waypoints) < MAX_WAYPOINTS:
+        blocker = blocking_planet(ship.map, start, target, goal)
+        if blocker is None:
+            waypoints.append(target)
+            break
+
+        distance = start - target
+        angle = start % target
+        corrections = max_corrections
+        end = target
+        while corrections > 0 and blocking_planet(ship.map, start, end,
+                                                  goal if end is target else None) is not None:
+            angle += angular_step
+            end = Position(start.x + math.cos(math.radians(angle)) * distance,
+                           start.y + math.sin(math.radians(angle)) * distance)
+            corrections -= 1
+        if corrections <= 0:
+            break
+
+        # stop the leg once past the planet we are going around
+        along = constants.MAX_SPEED
+        while along < distance:
+            point = Position(start.x + math.cos(math.radians(angle)) * along,
+                             start.y + math.sin(math.radians(angle)) * along)
+            if blocking_planet(ship.map, point, target, goal) is None:
+                end = point
+                break
+            along += constants.MAX_SPEED
+        waypoints.append(end)
+        start = end
+    return waypoints or None
@@ -8,16 +8,12 @@ class Persist(object):
         self.default = default
 
     def __get__(self, instance, owner):
+        inst_rec = instance.__class__._memory.setdefault(instance.id, {})
         try:
-            inst_rec = instance.__class__._memory[instance.id]
+            return inst_rec[self.attr]
         except KeyError:
-            instance.__class__._memory[instance.id] = {}
-        finally:
-            try:
-                return inst_rec[self.attr]
-            except KeyError:
-                instance.__class__._memory[instance.id][self.attr] = self.default
-                return self.default
+            inst_rec[self.attr] = self.default
+            return self.default
 
     def __set__(self, instance, value):
         if instance.id not in instance.__class__._memory:
@@ -0,0 +1,79 @@
+# pool.py
+
+import gc
+
+from .entity import Position
+
+
+#: Scratch points handed out before one is reused
+SCRATCH_POINTS = 16
+
+
+class EntityPool:
+    """
+    Recycles entity objects across frames by id: an entity that is still
+    alive next frame is re-initialised in place instead of reallocated.
+    Objects of entities that died are dropped rather than reused for new
+    ids, so a stale reference (e.g. a ship's target) never silently turns
+    into a different entity.
+
+    Kept on the Map; call begin_frame() before parsing each frame.
+    """
+
+    def __init__(self):
+        self._previous = {}
+        self._current = {}
+        self.reused = 0
+        self.allocated = 0
+        self._ring = [Position(0, 0) for _ in range(SCRATCH_POINTS)]
+        self._next = 0
+
+    def begin_frame(self):
+        self._previous = self._current
+        self._current = {}
+
+    def acquire(self, cls, entity_id, *args):
+        """
+        cls(*args) for entity_id, reusing last frame's object if there is one.
+        """
+        obj = self._previous.get(entity_id)
+        if obj is not None and type(obj) is cls:
+            obj.__init__(*args)
+            self.reused += 1
+        else:
+            obj = cls(*args)
+            self.allocated += 1
+        self._current[entity_id] = obj
+        return obj
+
+    def point(self, x, y):
+        """
+        A scratch Position for short-lived calculations, from a small ring;
+        it will be handed out again after SCRATCH_POINTS more calls, so
+        never keep one.
+        """
+        p = self._ring[self._next]
+        self._next = (self._next + 1) % SCRATCH_POINTS
+        p.x = x
+        p.y = y
+        return p
+
+
+def pause_gc():
+    """
+    Stop automatic cyclic garbage collection, so it cannot kick in halfway
+    through a turn. Objects alive now (the pre-game tables) are moved out of
+    the collector's sight where the interpreter supports it.
+    """
+    gc.collect()
+    if hasattr(gc, "freeze"):
+        gc.freeze()
+    gc.disable()
+
+
+def collect_between_turns():
+    """
+    Run the collection that pause_gc() suppressed. Meant for the time after
+    our commands are sent, while the engine and opponents are busy.
+    """
+    gc.collect()
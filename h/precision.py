@@ -0,0 +1,109 @@
+# precision.py
+
+from collections import deque
+import logging
+import math
+import time
+
+from . import constants
+
+
+#: Navigation settings from full precision to coarsest: (max_corrections,
+#: angular_step, ignore_ships, lookahead). lookahead is how far along the
+#: path collisions are checked.
+LEVELS = (
+    (90, 1, False, math.inf),
+    (90, 2, False, math.inf),
+    (60, 3, False, 4 * constants.MAX_SPEED),
+    (45, 5, False, 2 * constants.MAX_SPEED),
+    (36, 10, True, 2 * constants.MAX_SPEED),
+)
+
+#: Turns of timings the controller looks back over
+WINDOW = 10
+
+#: Keep this percentile of recent turn durations...
+PERCENTILE = 0.9
+
+#: ...under this fraction of the turn budget
+TARGET = 0.6
+
+#: Turn precision back up once that percentile is under this fraction of
+#: the target
+RELAX = 0.5
+
+#: Seconds before the turn's deadline at which navigation drops to the
+#: coarsest level for the rest of the turn
+HURRY = 0.3
+
+
+class Precision:
+    """
+    Picks how precisely Ship.navigate works, from measured turn durations
+    and the time navigation itself takes. Each turn the PERCENTILE of the
+    last WINDOW turn durations is compared to the TARGET share of the turn
+    budget: over it, and with navigation taking at least half the turn,
+    navigation gets one level coarser; well under it for a whole window,
+    one level finer.
+    Within a turn, navigation drops to the coarsest level once the turn
+    nears its deadline.
+    """
+
+    def __init__(self):
+        self.level = 0
+        self._durations = deque(maxlen=WINDOW)
+        self._started = None
+        self._deadline = None
+        self._nav_seconds = 0.0
+        self._nav_calls = 0
+        self.cost = 0.0  # running average of seconds per navigate call
+
+    def begin_turn(self, started, budget):
+        """
+        Called when a frame has been read at time started, with budget
+        seconds to answer it.
+        """
+        self._started = started
+        self._deadline = started + budget
+        self._budget = budget
+        self._nav_seconds = 0.0
+        self._nav_calls = 0
+
+    def end_turn(self):
+        """
+        Called when the turn's commands have been sent; adapts the level.
+        """
+        if self._started is None:
+            return
+        duration = time.time() - self._started
+        self._durations.append(duration)
+        if self._nav_calls:
+            self.cost = 0.8 * self.cost + 0.2 * self._nav_seconds / self._nav_calls
+        ranked = sorted(self._durations)
+        slow = ranked[int(PERCENTILE * (len(ranked) - 1))]
+        target = TARGET * self._budget
+        level = self.level
+        if slow > target and self._nav_seconds >= duration / 2:
+            self.level = min(self.level + 1, len(LEVELS) - 1)
+        elif slow < RELAX * target and len(self._durations) == WINDOW:
+            self.level = max(self.level - 1, 0)
+        if self.level != level:
+            logging.info("Precision: level {} -> {} ({:.3f}s turns, {} navigations at {:.4f}s)".format(
+                level, self.level, slow, self._nav_calls, self.cost))
+            self._durations.clear()  # judge the new level on its own turns
+
+    def settings(self):
+        """
+        (max_corrections, angular_step, ignore_ships, lookahead) to navigate
+        with right now.
+        """
+        if self._deadline is not None and time.time() >= self._deadline - HURRY:
+            return LEVELS[-1]
+        return LEVELS[self.level]
+
+    def record(self, seconds):
+        """
+        Called by Ship.navigate with the time one call took.
+        """
+        self._nav_seconds += seconds
+        self._nav_calls += 1
@@ -0,0 +1,293 @@
+# search.py
+
+import math
+import time
+
+from . import constants
+from . import intercept
+from .entity import Position
+from .snapshot import Snapshot
+
+
+#: What a ship may do this turn in a searched plan
+KEEP = 0  # whatever its task handler decided
+HOLD = 1  # stay put (and shoot)
+ATTACK = 2  # close in on the nearest enemy
+DOCK = 3  # head for the nearest mineable planet and dock
+RETREAT = 4  # back away from the nearest enemy
+ACTIONS = (KEEP, HOLD, ATTACK, DOCK, RETREAT)
+
+#: Our ships with an enemy this close are searched for; it is as far as
+#: two ships can close on each other in the horizon and still shoot
+ENGAGE_RADIUS = 2 * constants.MAX_SPEED + constants.WEAPON_RADIUS
+
+#: Most of our ships searched together in one group
+MAX_GROUP = 6
+
+#: Turns simulated to score a plan
+HORIZON = 3
+
+#: Beam widths tried in turn, each over every group, while time is left
+BEAM_WIDTHS = (1, 2, 4, 8, 16, 32)
+
+#: Score of a ship getting to dock, and of a ship destroyed, in health
+#: points (damage dealt and taken score one per point)
+DOCK_VALUE = 100
+KILL_VALUE = constants.MAX_SHIP_HEALTH // 2
+
+#: Seconds of the turn left for everything after the search
+RESERVE = 0.4
+
+#: Most work one search may do, over all groups: each plan simulated
+#: costs one per ship in its group (searched or not)
+MAX_NODES = 20000
+
+#: Distance at which ships can shoot each other
+FIRE_RANGE = constants.WEAPON_RADIUS + 2 * constants.SHIP_RADIUS
+
+
+class Group:
+    """
+    Our ships in one local fight (searched), and the other ships near them
+    (simulated but not searched): enemies chase our ships, our ships that
+    are not in the group stay where they are. Positions, health and docking
+    are copied out of Snapshot.ship_arrays() as plain lists, which each
+    simulation copies again instead of touching the Map.
+    """
+
+    def __init__(self, ours, others, arrays, game_map):
+        ids, owners, xs, ys, healths, statuses = arrays
+        self.local = ours + others
+        self.n = len(ours)
+        self.ids = [ids[i] for i in self.local]
+        self.owners = [owners[i] for i in self.local]
+        self.mine = [owners[i] == game_map.my_id for i in self.local]
+        self.xs = [xs[i] for i in self.local]
+        self.ys = [ys[i] for i in self.local]
+        self.healths = [healths[i] for i in self.local]
+        self.docked = [statuses[i] != 0 for i in self.local]
+        self.ships = [game_map.get_me().get_ship(ids[i]) for i in ours]
+
+        # per searched ship: its current move, the enemy it would attack,
+        # the planet it would dock at, and which actions make sense
+        self.moves = []
+        self.enemy = []
+        self.planet = []
+        self.actions = []
+        mineable = game_map.mineable_planets()
+        enemies = [j for j in range(len(self.local)) if not self.mine[j]]
+        for k, ship in enumerate(self.ships):
+            move = (0, 0.0)
+            if ship.command and ship.command.startswith("t") and ship.thrust_vector:
+                mag, angle = ship.thrust_vector
+                move = (mag, math.radians(angle))
+            self.moves.append(move)
+            self.enemy.append(min(enemies, key=lambda j: self._distance(k, j)) if enemies else None)
+            planet = min(mineable, key=lambda p: p - ship) if mineable else None
+            self.planet.append(planet)
+            self.actions.append([a for a in ACTIONS
+                                 if not (a == DOCK and planet is None)
+                                 and not (a in (ATTACK, RETREAT) and self.enemy[k] is None)])
+
+    def _distance(self, i, j):
+        return math.hypot(self.xs[i] - self.xs[j], self.ys[i] - self.ys[j])
+
+    def simulate(self, plan):
+        """
+        Score plan (an action per searched ship) over HORIZON turns: damage
+        dealt minus damage taken, plus kills and docks.
+        """
+        xs = list(self.xs)
+        ys = list(self.ys)
+        hs = list(self.healths)
+        docked = list(self.docked)
+        mine = self.mine
+        size = len(xs)
+        score = 0.0
+        for _ in range(HORIZON):
+            # move
+            for k in range(size):
+                if hs[k] <= 0 or docked[k]:
+                    continue
+                if k < self.n:
+                    action = plan[k]
+                    if action == KEEP:
+                        mag, angle = self.moves[k]
+                        xs[k] += mag * math.cos(angle)
+                        ys[k] += mag * math.sin(angle)
+                    elif action == ATTACK:
+                        j = self.enemy[k]
+                        _step(xs, ys, k, xs[j], ys[j], constants.WEAPON_RADIUS - 1)
+                    elif action == DOCK:
+                        p = self.planet[k]
+                        reach = p.radius + constants.DOCK_RADIUS + constants.SHIP_RADIUS
+                        if math.hypot(xs[k] - p.x, ys[k] - p.y) <= reach:
+                            docked[k] = True
+                            score += DOCK_VALUE
+                        else:
+                            _step(xs, ys, k, p.x, p.y, reach - 1)
+                    elif action == RETREAT:
+                        j = self.enemy[k]
+                        _step(xs, ys, k, 2 * xs[k] - xs[j], 2 * ys[k] - ys[j], 0)
+                elif not mine[k]:
+                    targets = [j for j in range(size) if mine[j] and hs[j] > 0]
+                    if targets:
+                        j = min(targets, key=lambda j: (xs[j] - xs[k]) ** 2 + (ys[j] - ys[k]) ** 2)
+                        _step(xs, ys, k, xs[j], ys[j], constants.WEAPON_RADIUS - 1)
+
+            # shoot, all at once
+            damage = [0.0] * size
+            for k in range(size):
+                if hs[k] <= 0 or docked[k]:
+                    continue
+                targets = [j for j in range(size) if mine[j] != mine[k] and hs[j] > 0
+                           and math.hypot(xs[j] - xs[k], ys[j] - ys[k]) <= FIRE_RANGE]
+                for j in targets:
+                    damage[j] += constants.WEAPON_DAMAGE / len(targets)
+            for j in range(size):
+                if damage[j]:
+                    dealt = min(damage[j], hs[j])
+                    hs[j] -= damage[j]
+                    sign = -1 if mine[j] else 1
+                    score += sign * dealt
+                    if hs[j] <= 0:
+                        score += sign * KILL_VALUE
+        return score
+
+
+def _step(xs, ys, k, tx, ty, stop):
+    """
+    Move entry k up to MAX_SPEED toward (tx, ty), stopping stop short of it.
+    """
+    d = math.hypot(tx - xs[k], ty - ys[k])
+    travel = min(constants.MAX_SPEED, d - stop)
+    if travel > 0 and d > 0:
+        xs[k] += (tx - xs[k]) / d * travel
+        ys[k] += (ty - ys[k]) / d * travel
+
+
+def engagements(game_map, arrays):
+    """
+    Split our undocked ships that have an enemy within ENGAGE_RADIUS into
+    Groups of at most MAX_GROUP ships close to each other.
+    """
+    ids, owners, xs, ys, healths, statuses = arrays
+    me = game_map.my_id
+    ours = [i for i in range(len(ids)) if owners[i] == me and statuses[i] == 0]
+    theirs = [i for i in range(len(ids)) if owners[i] != me]
+    everyone_mine = [i for i in range(len(ids)) if owners[i] == me]
+
+    def near(i, others):
+        return [j for j in others
+                if abs(xs[i] - xs[j]) <= ENGAGE_RADIUS and abs(ys[i] - ys[j]) <= ENGAGE_RADIUS
+                and math.hypot(xs[i] - xs[j], ys[i] - ys[j]) <= ENGAGE_RADIUS]
+
+    engaged = [i for i in ours if near(i, theirs)]
+    groups = []
+    while engaged:
+        seed = engaged.pop(0)
+        members = [seed] + near(seed, engaged)[:MAX_GROUP - 1]
+        engaged = [i for i in engaged if i not in members]
+        others = set()
+        for i in members:
+            others.update(near(i, theirs))
+            others.update(j for j in near(i, everyone_mine) if j not in members)
+        groups.append(Group(members, sorted(others), arrays, game_map))
+    return groups
+
+
+def _widen(group, plan, best, width, deadline, budget):
+    """
+    One beam search pass over group's ships, starting from plan. Returns the
+    best (score, plan) found, cut short once deadline passes or the budget
+    (a one-item list of MAX_NODES left, shared across calls) runs out.
+    """
+    beam = [(best, plan)]
+    for k in range(group.n):
+        candidates = []
+        for _, partial in beam:
+            for action in group.actions[k]:
+                candidate = list(partial)
+                candidate[k] = action
+                candidates.append((group.simulate(candidate), candidate))
+            budget[0] -= len(group.actions[k]) * len(group.local)
+            if time.time() >= deadline or budget[0] <= 0:
+                return best, plan
+        candidates.sort(key=lambda c: c[0], reverse=True)
+        beam = candidates[:width]
+        if beam[0][0] > best:
+            best, plan = beam[0]
+    return best, plan
+
+
+def search(game_map, deadline, max_nodes=MAX_NODES):
+    """
+    Anytime search of every local fight: each group's plan starts as its
+    handlers' moves, and beam searches of increasing width replace it with
+    better-scoring plans. The search stops at the deadline (a time.time()
+    value), once max_nodes of work (see MAX_NODES) is done, or once a width
+    finds nothing better for any group. The best plans found by then are
+    returned, as (group, plan) pairs; groups not reached before the
+    deadline keep their handlers' moves and are left out.
+    """
+    arrays = Snapshot.of(game_map).ship_arrays()
+    groups = engagements(game_map, arrays)
+    best = []
+    for group in groups:
+        if time.time() >= deadline:
+            break
+        plan = [KEEP] * group.n
+        best.append((group.simulate(plan), plan))
+    groups = groups[:len(best)]
+    budget = [max_nodes - sum(len(group.local) for group in groups)]
+    for width in BEAM_WIDTHS:
+        improved = False
+        for g, group in enumerate(groups):
+            if time.time() >= deadline or budget[0] <= 0:
+                return [(group, plan) for group, (_, plan) in zip(groups, best)]
+            found = _widen(group, best[g][1], best[g][0], width, deadline, budget)
+            if found[0] > best[g][0]:
+                best[g] = found
+                improved = True
+        if not improved:
+            break
+    return [(group, plan) for group, (_, plan) in zip(groups, best)]
+
+
+def execute(group, plan):
+    """
+    Give the group's ships the commands for their planned actions.
+    """
+    game_map = group.ships[0].map
+    for k, ship in enumerate(group.ships):
+        action = plan[k]
+        if action == KEEP:
+            continue
+        ship.command = None
+        if action == ATTACK:
+            j = group.enemy[k]
+            enemy = game_map.get_player(group.owners[j]).get_ship(group.ids[j])
+            ship.navigate(ship.closest_point_to(intercept.aim(ship, enemy), gap=enemy.radius + 1))
+        elif action == DOCK:
+            planet = group.planet[k]
+            if ship.can_dock(planet):
+                ship.dock(planet)
+            else:
+                ship.navigate(ship.closest_point_to(planet))
+        elif action == RETREAT:
+            j = group.enemy[k]
+            d = max(1e-6, math.hypot(ship.x - group.xs[j], ship.y - group.ys[j]))
+            x = ship.x + (ship.x - group.xs[j]) / d * constants.MAX_SPEED
+            y = ship.y + (ship.y - group.ys[j]) / d * constants.MAX_SPEED
+            ship.navigate(Position(min(max(x, 1), game_map.width - 1),
+                                   min(max(y, 1), game_map.height - 1)))
+
+
+def plan_fights(game_map, deadline):
+    """
+    search() and execute() the plans. Returns the number of groups.
+    """
+    plans = search(game_map, deadline)
+    for group, plan in plans:
+        execute(group, plan)
+    return len(plans)
@@ -3,11 +3,15 @@
 import math
 from enum import Enum
 import logging
+import time
 
 from .entity import Entity
 from .entity import Position
+from .planet import Planet
 from .persist import Persist
 from . import constants
+from . import paths
+from . import assignments
 from .assignments import IS
 
 
@@ -32,10 +36,10 @@ class Ship(Entity):
         self._weapon_cooldown = cooldown
 
         # custom
-        # self.task = IS.FREE  # TODO: make sure not forgotten
-        self.target = None  # TODO: make sure not forgotten
-        self.command = None  # holds string command to send to game.
+        # task and target persist across turns; Map.events rebinds targets
         self.map = None  # set when linked
+        self.command = None  # holds string command to send to game.
+        self.thrust_vector = None  # (magnitude, angle) of the last thrust
 
     #
     # LOGIC
@@ -45,24 +49,30 @@ class Ship(Entity):
         return self - planet <= planet.radius + constants.DOCK_RADIUS + constants.SHIP_RADIUS
 
     def resolve_task(self):
-        if not self.task:
+        if self.task is None:
             self.task = IS.FREE
-
-        # logging.info("{0}: {1.__name__}".format(self, self.task))
-        prev = self.task
-        self.task(self)
-        while prev != self.task:
-            # logging.info("{0}: reassigned to {1.__name__}".format(self, self.task))
-            prev = self.task
-            self.task(self)
+        assignments.resolve(self)
 
     #
     # COMMANDS
     #
 
+    @property
+    def command(self):
+        return self._command
+
+    @command.setter
+    def command(self, command):
+        # a command given now replaces a navigation still queued for the
+        # map's navigator
+        if self.map is not None and self.map.navigator is not None:
+            self.map.navigator.cancel(self)
+        self._command = command
+
     def thrust(self, mag, angle):
         # we want to round angle to nearest integer, but we want to round
         # magnitude down to prevent overshooting and unintended collisions
+        self.thrust_vector = (int(mag), round(angle))
         self.command = "t {} {} {}".format(self.id, int(mag), round(angle))
 
     def dock(self, planet):
@@ -72,8 +82,8 @@ class Ship(Entity):
         self.command = "u {}".format(self.id)
 
     def navigate(self, target, speed=constants.MAX_SPEED, avoid_obstacles=True,
-                 max_corrections=90, angular_step=1, ignore_ships=False,
-                 ignore_planets=False):
+                 max_corrections=None, angular_step=None, ignore_ships=None,
+                 ignore_planets=False, lookahead=None):
         """
         Move a ship to a specific target position (Entity). It is recommended to place the position
         itself here, else navigate will crash into the target. If avoid_obstacles is set to True (default)
@@ -90,12 +100,41 @@ class Ship(Entity):
         :param int angular_step: The degree difference to deviate if the original destination has obstacles
         :param bool ignore_ships: Whether to ignore ships in calculations (this will make your movement faster, but more precarious)
         :param bool ignore_planets: Whether to ignore planets in calculations (useful if you want to crash onto planets)
+        :param float lookahead: How far along the way to check for obstacles
         :return string: The command trying to be passed to the Halite engine or None if movement is not possible within max_corrections degrees.
         :rtype: str
+
+        max_corrections, angular_step, ignore_ships and lookahead left as None
+        are set by the map's precision controller (see precision.py).
         """
+        started = time.time()
+        level = self.map.precision.settings()
+        self._navigate(target, speed, avoid_obstacles,
+                       level[0] if max_corrections is None else max_corrections,
+                       level[1] if angular_step is None else angular_step,
+                       level[2] if ignore_ships is None else ignore_ships,
+                       ignore_planets,
+                       level[3] if lookahead is None else lookahead)
+        self.map.precision.record(time.time() - started)
+
+    def _navigate(self, target, speed, avoid_obstacles, max_corrections, angular_step,
+                  ignore_ships, ignore_planets, lookahead):
         # Assumes a position, not planet (as it would go to the center of the planet otherwise)
+        if avoid_obstacles and not ignore_planets and self._follow_route(target, speed, max_corrections,
+                                                                        angular_step, ignore_ships):
+            return None
+        if avoid_obstacles and not ignore_planets and self.map.navigator is not None:
+            # steered with the rest of the queue in Map.flush_navigation
+            self.map.navigator.defer(self, target, speed, max_corrections, angular_step,
+                                     ignore_ships, lookahead)
+            return None
+
         distance = self - target
         angle = self % target
+        probe = min(distance, lookahead)  # how far along to check
+        if probe < distance:
+            target = self.map.pool.point(self.x + math.cos(math.radians(angle)) * probe,
+                                         self.y + math.sin(math.radians(angle)) * probe)
         ignore = () if not (ignore_ships or ignore_planets) \
             else Ship if (ignore_ships and not ignore_planets) \
             else Planet if (ignore_planets and not ignore_ships) \
@@ -104,9 +143,9 @@ class Ship(Entity):
             while (max_corrections > 0 and
                    self.map.obstacles_between(self, target, ignore)):
                 angle += angular_step
-                dx = math.cos(math.radians(angle)) * distance
-                dy = math.sin(math.radians(angle)) * distance
-                target = Position(self.x + dx, self.y + dy)
+                dx = math.cos(math.radians(angle)) * probe
+                dy = math.sin(math.radians(angle)) * probe
+                target = self.map.pool.point(self.x + dx, self.y + dy)
                 max_corrections -= 1
             if max_corrections <= 0:
                 # logging.info("Navigate: {} to {}".format(self, target))
@@ -114,6 +153,41 @@ class Ship(Entity):
         speed = speed if (distance >= speed) else distance
         self.thrust(speed, angle)
 
+    def _follow_route(self, target, speed, max_corrections, angular_step, ignore_ships):
+        """
+        Thrust along the cached (or newly planned) route around planets to
+        target. This turn's move, as rounded for the engine, is checked
+        against planets and (unless ignore_ships) ships. Returns False,
+        dropping the route and leaving navigate to correct around obstacles
+        itself, if no route exists or something is in the way.
+        """
+        cache = self.map.paths
+        route = cache.lookup(self, target)
+        if route is None:
+            waypoints = paths.plan(self, target, max_corrections, angular_step)
+            if waypoints is None:
+                return False
+            route = cache.store(self, target, waypoints)
+
+        waypoint = route.next_waypoint(self, speed)
+        if waypoint is None:
+            cache.forget(self)
+            return False
+        distance = self - waypoint
+        angle = self % waypoint
+        speed = speed if (distance >= speed) else distance
+        mag, angle = int(speed), round(angle)
+        end = Position(self.x + mag * math.cos(math.radians(angle)),
+                       self.y + mag * math.sin(math.radians(angle)))
+        goal = target if waypoint is target and isinstance(target, Planet) else None
+        if (paths.blocking_planet(self.map, self, end, goal) is not None or
+                not ignore_ships and self.map.obstacles_between(self, end, Planet)):
+            cache.forget(self)
+            return False
+        self.thrust(mag, angle)
+        route.expected = end
+        return True
+
     #
     # PARSING AND LINKING
     #
@@ -127,9 +201,10 @@ class Ship(Entity):
         self.planet = map_state._planets.get(self.planet)  # If not will just reset to none
 
     @staticmethod
-    def _parse_single(player_id, tokens):
+    def _parse_single(player_id, tokens, pool=None):
         """
         Parse a single ship given tokenized input from the game environment.
+        If a pool is given, the ship object is recycled from the last frame.
         """
         (sid, x, y, hp, vel_x, vel_y,
          docked, docked_planet, progress, cooldown, *remainder) = tokens
@@ -137,23 +212,24 @@ class Ship(Entity):
         sid = int(sid)
         docked = Ship.DockingStatus(int(docked))
 
-        ship = Ship(player_id,
-                    sid,
-                    float(x), float(y),
-                    int(hp),
-                    float(vel_x), float(vel_y),
-                    docked, int(docked_planet),
-                    int(progress), int(cooldown))
+        args = (player_id,
+                sid,
+                float(x), float(y),
+                int(hp),
+                float(vel_x), float(vel_y),
+                docked, int(docked_planet),
+                int(progress), int(cooldown))
+        ship = pool.acquire(Ship, sid, *args) if pool else Ship(*args)
 
         return sid, ship, remainder
 
     @staticmethod
-    def _parse(player_id, tokens):
+    def _parse(player_id, tokens, pool=None):
         """
         Parse ship data given a tokenized input.
         """
         ships = {}
         num_ships, *remainder = tokens
         for _ in range(int(num_ships)):
-            ship_id, ships[ship_id], remainder = Ship._parse_single(player_id, remainder)
+            ship_id, ships[ship_id], remainder = Ship._parse_single(player_id, remainder, pool)
         return ships, remainder
@@ -0,0 +1,107 @@
+# snapshot.py
+
+from array import array
+from collections import namedtuple
+
+
+#: Owner recorded for unowned planets
+NOBODY = -1
+
+ShipState = namedtuple("ShipState", "id owner x y health docking_status planet")
+ShipState.__doc__ = """
+Frozen ship fields. owner is a player id, docking_status the int value of
+Ship.DockingStatus and planet a planet id (or None).
+"""
+
+PlanetState = namedtuple("PlanetState", "id owner x y radius health num_docking_spots "
+                                        "current_production remaining_resources docked_ship_ids")
+PlanetState.__doc__ = """
+Frozen planet fields. owner is a player id or NOBODY, docked_ship_ids a
+tuple of ship ids.
+"""
+
+
+class Snapshot:
+    """
+    An immutable copy of a Map's game state, made of tuples of plain
+    values. Taking one is a single pass over the ships and planets, with no
+    references back into the live Map, so it is cheap enough to take every
+    turn and safe to hand to other threads or rollouts.
+    """
+    __slots__ = ("my_id", "width", "height", "ships", "planets", "_ships_by_id", "_planets_by_id")
+
+    def __init__(self, my_id, width, height, ships, planets):
+        self.my_id = my_id
+        self.width = width
+        self.height = height
+        self.ships = ships
+        self.planets = planets
+        self._ships_by_id = None
+        self._planets_by_id = None
+
+    @staticmethod
+    def of(game_map):
+        ships = []
+        for player in game_map.all_players():
+            for s in player.all_ships():
+                ships.append(ShipState(s.id, player.id, s.x, s.y, s.health, s.docking_status.value,
+                                       s.planet.id if s.planet is not None else None))
+        planets = tuple(
+            PlanetState(p.id, p.owner.id if p.owner is not None else NOBODY, p.x, p.y,
+                        p.radius, p.health, p.num_docking_spots, p.current_production,
+                        p.remaining_resources, tuple(p._docked_ship_ids))
+            for p in game_map.all_planets())
+        return Snapshot(game_map.my_id, game_map.width, game_map.height, tuple(ships), planets)
+
+    #
+    # LOOKUPS
+    #
+
+    def get_ship(self, ship_id):
+        if self._ships_by_id is None:
+            self._ships_by_id = {s.id: s for s in self.ships}
+        return self._ships_by_id.get(ship_id)
+
+    def get_planet(self, planet_id):
+        if self._planets_by_id is None:
+            self._planets_by_id = {p.id: p for p in self.planets}
+        return self._planets_by_id.get(planet_id)
+
+    def ships_of(self, player_id):
+        return [s for s in self.ships if s.owner == player_id]
+
+    def player_ids(self):
+        return sorted(set(s.owner for s in self.ships))
+
+    #
+    # ROLLOUTS
+    #
+
+    def ship_arrays(self):
+        """
+        Fresh, mutable column arrays of the ships, for simulations to step
+        forward in place: (ids, owners, xs, ys, healths, docking_statuses).
+        """
+        return (array('l', (s.id for s in self.ships)),
+                array('l', (s.owner for s in self.ships)),
+                array('d', (s.x for s in self.ships)),
+                array('d', (s.y for s in self.ships)),
+                array('l', (s.health for s in self.ships)),
+                array('b', (s.docking_status for s in self.ships)))
+
+    def planet_arrays(self):
+        """
+        Fresh, mutable column arrays of the planets:
+        (ids, owners, xs, ys, radii, healths).
+        """
+        return (array('l', (p.id for p in self.planets)),
+                array('l', (p.owner for p in self.planets)),
+                array('d', (p.x for p in self.planets)),
+                array('d', (p.y for p in self.planets)),
+                array('d', (p.radius for p in self.planets)),
+                array('l', (p.health for p in self.planets)))
+
+    def __str__(self):
+        return "Snapshot({} ships, {} planets)".format(len(self.ships), len(self.planets))
+
+    __repr__ = __str__
@@ -0,0 +1,204 @@
+# speculate.py
+
+import logging
+import math
+import queue
+import threading
+
+from . import constants
+from .entity import Position
+from .params import PARAMS
+from .snapshot import NOBODY
+
+
+#: A prediction holds while the ship is this close to where it was predicted
+TOLERANCE = 0.5
+
+#: Seconds Speculator.finish() waits for the worker to notice it should stop
+STOP_WAIT = 0.05
+
+
+class Forecast:
+    """
+    The likely next frame, worked out while the engine runs the turn: where
+    every ship should be, the nearest mineable planet for our ships without
+    a target, routes to the planets our ships are heading for, and which of
+    our planets enemies will be near.
+    """
+
+    def __init__(self, positions):
+        self.positions = positions  # ship id -> predicted (x, y)
+        self.targets = {}  # our ship id -> planet id
+        self.routes = {}  # our ship id -> (goal, waypoints)
+        self.threatened = None  # frozenset of planet ids, once computed
+
+    def holds(self, ship):
+        """
+        Whether ship is where it was predicted to be.
+        """
+        predicted = self.positions.get(ship.id)
+        return (predicted is not None and
+                math.hypot(ship.x - predicted[0], ship.y - predicted[1]) <= TOLERANCE)
+
+    def target(self, ship):
+        """
+        The predicted nearest mineable planet for ship, if the prediction
+        holds and the planet still is mineable, else None.
+        """
+        planet_id = self.targets.get(ship.id)
+        if planet_id is None or not self.holds(ship):
+            return None
+        planet = ship.map.get_planet(planet_id)
+        return planet if planet is not None and planet.is_mineable() else None
+
+    def threat_map(self, game_map, enemies):
+        """
+        The predicted threatened planets if every enemy ship is where it was
+        predicted to be, else None.
+        """
+        if self.threatened is None or not all(self.holds(s) for s in enemies):
+            return None
+        return self.threatened
+
+    def apply(self, game_map):
+        """
+        Hand the predicted routes to the path cache, for ships that have
+        none. The cache checks them like its own: they are used only if the
+        ship is where it was predicted and heads for about the same goal.
+        """
+        used = 0
+        for ship in game_map.get_me().all_ships():
+            if ship.id in self.routes and ship not in game_map.paths:
+                goal, waypoints = self.routes[ship.id]
+                route = game_map.paths.store(ship, goal, waypoints)
+                route.expected = Position(*self.positions[ship.id])
+                used += 1
+        if used:
+            logging.info("Speculation: {} routes ready".format(used))
+
+
+def predict(game_map):
+    """
+    Where every ship should be next frame: ours moved by the thrust we just
+    sent, enemies extrapolated from their history.
+    """
+    positions = {}
+    me = game_map.my_id
+    for ship in game_map.all_ships():
+        if ship.owner.id == me:
+            if ship.command and ship.thrust_vector and ship.command.startswith("t"):
+                mag, angle = ship.thrust_vector
+                positions[ship.id] = (ship.x + mag * math.cos(math.radians(angle)),
+                                      ship.y + mag * math.sin(math.radians(angle)))
+            else:
+                positions[ship.id] = (ship.x, ship.y)
+        else:
+            p = game_map.history.predict(ship, 1)
+            positions[ship.id] = (p.x, p.y)
+    return positions
+
+
+class Speculator:
+    """
+    A background thread that works out a Forecast while we wait for the
+    next frame. start() hands it the turn just sent; finish() stops it as
+    soon as the frame arrives and returns whatever it got done. The worker
+    only reads the Snapshot and plain values prepared by start(), and the
+    (unchanging) visibility graph. Every job has its own stop and done
+    events, so a job still running from an earlier turn can neither hold up
+    nor finish for the current one.
+    """
+
+    def __init__(self, threat_range):
+        self.threat_range = threat_range
+        self._jobs = queue.Queue()
+        self._current = None  # (forecast, stop, done) of the job started last
+        thread = threading.Thread(target=self._run, name="speculator", daemon=True)
+        thread.start()
+
+    def start(self, game_map, snapshot):
+        """
+        Queue the forecast of the frame after the one in snapshot (which is
+        game_map's state, with this turn's commands set on the ships).
+        """
+        me = game_map.get_me()
+        targets = {}
+        for ship in me.all_ships():
+            if ship.docking_status is not ship.DockingStatus.UNDOCKED:
+                continue
+            target = ship.target
+            targets[ship.id] = target.id if hasattr(target, "num_docking_spots") else None
+        if self._current is not None:
+            self._current[1].set()  # never finished; stop it
+        forecast = Forecast(predict(game_map))
+        stop = threading.Event()
+        done = threading.Event()
+        self._current = (forecast, stop, done)
+        self._jobs.put((snapshot, targets, game_map.graph, forecast, stop, done))
+
+    def finish(self):
+        """
+        Stop the worker and return its Forecast, or None if it was not
+        started this turn.
+        """
+        if self._current is None:
+            return None
+        (forecast, stop, done), self._current = self._current, None
+        stop.set()
+        if not done.wait(STOP_WAIT):
+            logging.info("Speculation: worker still busy, ignoring it")
+            return None
+        return forecast
+
+    def _run(self):
+        while True:
+            snapshot, targets, graph, forecast, stop, done = self._jobs.get()
+            try:
+                if not stop.is_set():
+                    self._speculate(snapshot, targets, graph, forecast, stop)
+            except Exception:
+                logging.exception("Speculation failed")
+            finally:
+                done.set()
+
+    def _speculate(self, snapshot, targets, graph, forecast, stop):
+        positions = forecast.positions
+        mineable = [p for p in snapshot.planets
+                    if p.owner == NOBODY or
+                    (p.owner == snapshot.my_id and len(p.docked_ship_ids) < p.num_docking_spots)]
+        planets = {p.id: p for p in snapshot.planets}
+
+        # threat map first, it is the cheapest
+        enemies = [positions[s.id] for s in snapshot.ships
+                   if s.owner != snapshot.my_id and s.docking_status == 0]
+        threatened = set()
+        for p in snapshot.planets:
+            if p.owner != snapshot.my_id:
+                continue
+            reach = p.radius + self.threat_range
+            if any(math.hypot(x - p.x, y - p.y) <= reach for x, y in enemies):
+                threatened.add(p.id)
+        forecast.threatened = frozenset(threatened)
+
+        for ship_id, planet_id in targets.items():
+            if stop.is_set():
+                return
+            x, y = positions[ship_id]
+            if planet_id is None:
+                if not mineable:
+                    continue
+                planet = min(mineable, key=lambda p: math.hypot(p.x - x, p.y - y))
+                forecast.targets[ship_id] = planet.id
+            else:
+                planet = planets.get(planet_id)
+                if planet is None:
+                    continue
+            if graph is None:
+                continue
+            # the approach point handle_mining will ask for
+            angle = math.atan2(y - planet.y, x - planet.x)
+            radius = planet.radius + PARAMS["approach_gap"]
+            goal = Position(planet.x + radius * math.cos(angle), planet.y + radius * math.sin(angle))
+            waypoints = graph.route(Position(x, y), goal)
+            if waypoints is not None and math.hypot(goal.x - x, goal.y - y) > constants.MAX_SPEED:
+                forecast.routes[ship_id] = (goal, waypoints)
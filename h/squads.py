@@ -0,0 +1,129 @@
+# squads.py
+
+import math
+
+from .entity import Position
+from .params import PARAMS
+
+
+#: Ships closer than this (center to center) are put in the same squad
+SQUAD_RADIUS = PARAMS["squad_radius"]
+
+
+class Squad:
+    """
+    A group of ships close enough together to be steered as one unit.
+    The leader (the member nearest the centroid) plans the path, and every
+    other member copies its thrust so that the formation keeps its shape.
+    """
+
+    def __init__(self, ships):
+        self.ships = list(ships)
+        self.x = sum(s.x for s in self.ships) / len(self.ships)
+        self.y = sum(s.y for s in self.ships) / len(self.ships)
+        self.leader = min(self.ships,
+                          key=lambda s: (s.x - self.x) ** 2 + (s.y - self.y) ** 2)
+
+    def __len__(self):
+        return len(self.ships)
+
+    def __iter__(self):
+        return iter(self.ships)
+
+    def members(self):
+        """
+        Lists all ships in the squad except the leader
+        """
+        return [s for s in self.ships if s is not self.leader]
+
+    def navigate(self, target, **kwargs):
+        """
+        Plan one path for the squad. The leader navigates to target; each
+        member applies the same thrust, which holds its offset from the
+        leader. Members whose copied move would hit a planet or a ship not
+        moving with the leader (or when the leader finds no path) fall back
+        to navigating on their own, towards target shifted by their
+        formation offset. Only members that copy the leader's move ignore
+        each other, as they all move the same way; a member that falls back
+        is an obstacle to the rest, so copied moves are checked again until
+        none is dropped.
+        """
+        leader = self.leader
+        leader.command = None
+        with leader.map.navigating_now():  # members need its move now
+            leader.navigate(target, **kwargs)
+        vector = leader.thrust_vector if leader.command else None
+
+        copying = {}  # member -> end of its copied move
+        if vector is not None:
+            mag, angle = vector
+            dx = mag * math.cos(math.radians(angle))
+            dy = mag * math.sin(math.radians(angle))
+            copying = {ship: Position(ship.x + dx, ship.y + dy) for ship in self.members()}
+        formation = set(copying) | {leader}
+        blocked = True
+        while blocked:
+            blocked = [ship for ship, end in copying.items()
+                       if any(o not in formation for o in ship.map.obstacles_between(ship, end))]
+            for ship in blocked:
+                del copying[ship]
+                formation.discard(ship)
+
+        for ship in self.members():
+            if ship in copying:
+                ship.thrust(*vector)
+            else:
+                ship.navigate(Position(target.x + ship.x - leader.x,
+                                       target.y + ship.y - leader.y), **kwargs)
+
+    def __str__(self):
+        return "Squad({} led by {})".format(len(self.ships), self.leader)
+
+    __repr__ = __str__
+
+
+def form_squads(ships, radius=SQUAD_RADIUS):
+    """
+    Cluster ships into squads: connected components of the graph joining
+    every pair of ships within radius of each other. Ships are bucketed into
+    a grid of radius-sized cells so only neighbouring cells are compared.
+    Docked ships are never grouped; each one is its own squad.
+    """
+    mobile = []
+    squads = []
+    for ship in ships:
+        if ship.docking_status is ship.DockingStatus.UNDOCKED:
+            mobile.append(ship)
+        else:
+            squads.append(Squad([ship]))
+
+    grid = {}
+    for i, ship in enumerate(mobile):
+        cell = (int(ship.x // radius), int(ship.y // radius))
+        grid.setdefault(cell, []).append(i)
+
+    parent = list(range(len(mobile)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    limit = radius ** 2
+    for (cx, cy), members in grid.items():
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                for j in grid.get((cx + dx, cy + dy), ()):
+                    for i in members:
+                        if i >= j:
+                            continue
+                        a, b = mobile[i], mobile[j]
+                        if (a.x - b.x) ** 2 + (a.y - b.y) ** 2 <= limit:
+                            parent[find(i)] = find(j)
+
+    groups = {}
+    for i, ship in enumerate(mobile):
+        groups.setdefault(find(i), []).append(ship)
+    squads.extend(Squad(group) for group in groups.values())
+    return squads
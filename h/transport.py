@@ -0,0 +1,142 @@
+# transport.py
+
+import abc
+import queue
+import sys
+
+
+class Transport(metaclass=abc.ABCMeta):
+    """
+    How a Game talks to the engine: whole lines in, buffered writes out.
+    Subclasses must implement all three methods.
+    """
+
+    @abc.abstractmethod
+    def read_line(self):
+        """
+        The next line from the engine without its newline, or "" at the end
+        of input.
+        """
+
+    @abc.abstractmethod
+    def write(self, s):
+        """
+        Queue s to be sent with the next flush().
+        """
+
+    @abc.abstractmethod
+    def flush(self):
+        """
+        Send everything written since the last flush.
+        """
+
+
+class StdioTransport(Transport):
+    """
+    The real engine protocol over stdin/stdout. Reads whole lines from the
+    binary buffers (no text-layer decoding per character) and sends each
+    turn's writes as a single write call. If record is a path, every line
+    read is also saved there, for RecordedTransport to play back.
+    """
+
+    def __init__(self, stdin=None, stdout=None, record=None):
+        self._in = stdin or sys.stdin.buffer
+        self._out = stdout or sys.stdout.buffer
+        self._pending = []
+        self._record = open(record, "w") if record else None
+
+    def read_line(self):
+        line = self._in.readline().decode("ascii").rstrip("\n")
+        if self._record:
+            self._record.write(line + "\n")
+            self._record.flush()
+        return line
+
+    def write(self, s):
+        self._pending.append(s)
+
+    def flush(self):
+        self._out.write("".join(self._pending).encode("ascii"))
+        self._out.flush()
+        self._pending = []
+
+
+class QueueTransport(Transport):
+    """
+    An in-memory connection, for running a bot in-process (see arena.worker).
+    The bot's Game uses the Transport methods; the driving side uses send(),
+    receive() and close().
+    """
+
+    def __init__(self):
+        self._to_bot = queue.Queue()
+        self._from_bot = queue.Queue()
+        self._pending = []
+
+    # bot side
+
+    def read_line(self):
+        line = self._to_bot.get()
+        return "" if line is None else line
+
+    def write(self, s):
+        self._pending.append(s)
+
+    def flush(self):
+        for line in "".join(self._pending).splitlines():
+            self._from_bot.put(line)
+        self._pending = []
+
+    def hang_up(self):
+        """
+        Called from the bot side when it stops, so receive() returns None.
+        """
+        self._from_bot.put(None)
+
+    # engine side
+
+    def send(self, line):
+        self._to_bot.put(line.rstrip("\n"))
+
+    def receive(self, timeout=None):
+        """
+        The bot's next line, or None if it hung up or timeout expired.
+        """
+        try:
+            return self._from_bot.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        """
+        End of input for the bot.
+        """
+        self._to_bot.put(None)
+
+
+class RecordedTransport(Transport):
+    """
+    Plays back the engine side of a recorded game (the file written by
+    StdioTransport's record option), for benchmarking a bot on real frames.
+    What the bot sends is kept in sent, one entry per flush.
+    """
+
+    def __init__(self, path):
+        with open(path) as f:
+            self._lines = [line.rstrip("\n") for line in f]
+        self._next = 0
+        self._pending = []
+        self.sent = []
+
+    def read_line(self):
+        if self._next >= len(self._lines):
+            return ""
+        self._next += 1
+        return self._lines[self._next - 1]
+
+    def write(self, s):
+        self._pending.append(s)
+
+    def flush(self):
+        self.sent.append("".join(self._pending))
+        self._pending = []
@@ -1,3 +1,7 @@
+from array import array
+import itertools
+import math
+
 from . import collision, entity
 
 
@@ -21,6 +25,8 @@ class Map:
         self.height = height
         self._players = {}
         self._planets = {}
+        self._entities = []  # planets then ships, rebuilt by _link
+        self._columns = ((), (), (), ())  # x, y, radius, is_planet per entity
 
     def get_me(self):
         """
@@ -66,10 +72,11 @@ class Map:
         :rtype: dict
         """
         result = {}
-        for foreign_entity in self._all_ships() + self.all_planets():
+        x, y = entity.x, entity.y
+        for foreign_entity, ex, ey in zip(self._entities, self._columns[0], self._columns[1]):
             if entity == foreign_entity:
                 continue
-            result.setdefault(entity.calculate_distance_between(foreign_entity), []).append(foreign_entity)
+            result.setdefault(math.sqrt((ex - x) ** 2 + (ey - y) ** 2), []).append(foreign_entity)
         return result
 
     def _link(self):
@@ -78,8 +85,13 @@ class Map:
 
         :return:
         """
-        for celestial_object in self.all_planets() + self._all_ships():
+        self._entities = self.all_planets() + self._all_ships()
+        for celestial_object in self._entities:
             celestial_object._link(self._players, self._planets)
+        self._columns = (array('d', (e.x for e in self._entities)),
+                         array('d', (e.y for e in self._entities)),
+                         array('d', (e.radius for e in self._entities)),
+                         array('b', (isinstance(e, entity.Planet) for e in self._entities)))
 
     def _parse(self, map_string):
         """
@@ -116,11 +128,15 @@ class Map:
         :return: The colliding entity if so, else None.
         :rtype: entity.Entity
         """
-        for celestial_object in self._all_ships() + self.all_planets():
+        x, y = target.x, target.y
+        split = len(self._planets)
+        for i in itertools.chain(range(split, len(self._entities)), range(split)):
+            celestial_object = self._entities[i]
+            ex, ey, r = self._columns[0][i], self._columns[1][i], self._columns[2][i]
             if celestial_object is target:
                 continue
-            d = celestial_object.calculate_distance_between(target)
-            if d <= celestial_object.radius + target.radius + 0.1:
+            d = math.sqrt((ex - x) ** 2 + (ey - y) ** 2)
+            if d <= r + target.radius + 0.1:
                 return celestial_object
         return None
 
@@ -135,12 +151,20 @@ class Map:
         :rtype: list[entity.Entity]
         """
         obstacles = []
-        entities = ([] if issubclass(entity.Planet, ignore) else self.all_planets()) \
-            + ([] if issubclass(entity.Ship, ignore) else self._all_ships())
-        for foreign_entity in entities:
+        planets = not issubclass(entity.Planet, ignore)
+        ships = not issubclass(entity.Ship, ignore)
+        fudge = ship.radius + 0.1
+        # entities whose bounding box misses the segment's cannot intersect it
+        low_x, high_x = min(ship.x, target.x) - fudge, max(ship.x, target.x) + fudge
+        low_y, high_y = min(ship.y, target.y) - fudge, max(ship.y, target.y) + fudge
+        for foreign_entity, ex, ey, r, is_planet in zip(self._entities, *self._columns):
+            if not (planets if is_planet else ships):
+                continue
+            if ex + r < low_x or ex - r > high_x or ey + r < low_y or ey - r > high_y:
+                continue
             if foreign_entity == ship or foreign_entity == target:
                 continue
-            if collision.intersect_segment_circle(ship, target, foreign_entity, fudge=ship.radius + 0.1):
+            if collision.intersect_segment_circle(ship, target, foreign_entity, fudge=fudge):
                 obstacles.append(foreign_entity)
         return obstacles
 
@@ -0,0 +1,69 @@
+import math
+import unittest
+
+from h import collision
+from h import constants
+from h import paths
+from h.entity import Position
+from h.game_map import Map
+
+
+def frame(ships, planets):
+    """
+    A frame as the engine sends it. ships: (owner, id, x, y);
+    planets: (id, x, y, radius), all unowned.
+    """
+    tokens = ["2"]
+    for owner in (0, 1):
+        mine = [s for s in ships if s[0] == owner]
+        tokens += [str(owner), str(len(mine))]
+        for _, sid, x, y in mine:
+            tokens += [str(sid), str(x), str(y), "255", "0", "0", "0", "0", "0", "0"]
+    tokens.append(str(len(planets)))
+    for pid, x, y, radius in planets:
+        tokens += [str(pid), str(x), str(y), "1000", str(radius), "3", "0", "1000", "0", "0", "0"]
+    return " ".join(tokens)
+
+
+def game_map(ships, planets):
+    m = Map(0, 240, 160)
+    m._parse(frame(ships, planets))
+    return m
+
+
+def move_end(ship):
+    mag, angle = ship.thrust_vector
+    return Position(ship.x + mag * math.cos(math.radians(angle)),
+                    ship.y + mag * math.sin(math.radians(angle)))
+
+
+class RouteTest(unittest.TestCase):
+
+    def test_waypoint_beyond_a_planet_is_not_flown_through(self):
+        # the ship sits on its first waypoint; the next one is on the far
+        # side of planet 0
+        m = game_map([(0, 0, 83.0, 34.1), (1, 9, 200.0, 20.0)], [(0, 93.4, 34.1, 8.0)])
+        ship = m.get_me().get_ship(0)
+        target = Position(166.7, 132.7)
+        waypoints = [Position(83.0, 34.1), Position(103.9, 34.1), target]
+        route = m.paths.store(ship, target, waypoints)
+        route.expected = Position(ship.x, ship.y)
+
+        ship.navigate(target)
+
+        self.assertIsNotNone(ship.command)
+        planet = m.get_planet(0)
+        self.assertFalse(collision.intersect_segment_circle(
+            ship, move_end(ship), planet, fudge=constants.SHIP_RADIUS + 0.1))
+
+    def test_target_planet_does_not_block_its_own_route(self):
+        m = game_map([(0, 0, 50.0, 50.0), (1, 9, 200.0, 20.0)], [(0, 80.0, 50.0, 5.0)])
+        ship = m.get_me().get_ship(0)
+        planet = m.get_planet(0)
+        self.assertIsNotNone(paths.blocking_planet(m, ship, planet))
+        self.assertIsNone(paths.blocking_planet(m, ship, planet, planet))
+        self.assertEqual(paths.plan(ship, planet), [planet])
+
+
+if __name__ == "__main__":
+    unittest.main()